@@ -1,5 +1,7 @@
 """Adaptable Priority Queue."""
 
+from array import array
+
 
 class Element:
     """An Element to store data with an associated key."""
@@ -42,12 +44,23 @@ class Element:
 
 
 class AdaptablePQ:
-    """Adaptable Priority Queue."""
+    """Adaptable Priority Queue.
+
+    Stored as a d-ary heap, where each node has up to d children.
+    """
+
+    def __init__(self, d=2):
+        """Initialise a new queue.
 
-    def __init__(self):
-        """Initialise a new queue."""
+        Args:
+            d (int): Number of children of each node in the heap.
+                     (Default: 2)
+        """
+        if d < 2:
+            raise ValueError("A heap needs at least 2 children per node")
         self._heap = []
         self._size = 0
+        self._d = d
 
     def __len__(self):
         """Return the length of the queue."""
@@ -66,6 +79,76 @@ class AdaptablePQ:
         self._size += 1
         return element
 
+    def add_many(self, items):
+        """Add many items to the queue at once.
+
+        When there are at least as many new items as items already in the
+        queue, the heap is rebuilt bottom-up in linear time rather than
+        bubbling up each item.
+
+        Args:
+            items (iterable): (key, value) pairs to add.
+
+        Returns:
+            A list of references to the items within the queue, in order.
+        """
+        start = self._size
+        elements = [Element(key, value, index)
+                    for index, (key, value) in enumerate(items, start)]
+        self._heap.extend(elements)
+        self._size += len(elements)
+        self._restore(start)
+        return elements
+
+    @classmethod
+    def from_items(cls, items, *args):
+        """Return a new queue built from many items in linear time.
+
+        Args:
+            items (iterable): (key, value) pairs to add.
+            *args: Passed on to the constructor of the queue.
+        """
+        queue = cls(*args)
+        queue.add_many(items)
+        return queue
+
+    def merge(self, other):
+        """Move every item from another queue into this one.
+
+        References to items in the other queue stay valid in this queue,
+        and the other queue is left empty.
+
+        Args:
+            other (AdaptablePQ): The queue to merge into this one.
+
+        Raises:
+            ValueError: If other is this queue.
+        """
+        if other is self:
+            raise ValueError("Cannot merge a queue into itself")
+        start = self._size
+        for element in other._heap:
+            element._index = self._size
+            self._heap.append(element)
+            self._size += 1
+        other._clear()
+        self._restore(start)
+
+    def _clear(self):
+        """Forget every item, after they were moved to another queue."""
+        self._heap = []
+        self._size = 0
+
+    def _restore(self, start):
+        """Restore the heap after items were appended from index start."""
+        if self._size - start >= start:
+            # Heapify bottom-up from the last node with children
+            for i in range((self._size - 2) // self._d, -1, -1):
+                self._bubbledown(i)
+        else:
+            for i in range(start, self._size):
+                self._bubbleup(i)
+
     def get_min(self):
         """Return the highest priority item in the queue."""
         element = self._get_min_element()
@@ -112,6 +195,24 @@ class AdaptablePQ:
         if min_element is not None:
             return self.remove(min_element)
 
+    def replace_min(self, key, value):
+        """Remove the highest priority item and add another in its place.
+
+        Takes a single sift down, rather than one to remove the item and
+        one to add the new item.
+
+        Returns:
+            A reference to the new item within the queue.
+        """
+        old = self._get_min_element()
+        if old is None:
+            return self.add(key, value)
+        element = Element(key, value, 0)
+        self._heap[0] = element
+        self._bubbledown(0)
+        old._wipe()
+        return element
+
     def get_key(self, element):
         """Return the current key for element.
 
@@ -136,29 +237,66 @@ class AdaptablePQ:
     def _rebalance(self, i):
         """Rebalance the item at index to the correct position."""
         if i < self._size:
-            parent = (i - 1) // 2
-            if parent >= 0 and self._heap[i] < self._heap[parent]:
+            parent = (i - 1) // self._d
+            if i > 0 and self._heap[i]._key < self._heap[parent]._key:
                 self._bubbleup(i)
             else:
                 self._bubbledown(i)
 
     def _bubbleup(self, i):
-        """Bubble item at index up to its correct position in the heap."""
-        parent = (i - 1) // 2
-        if parent >= 0 and self._heap[i] < self._heap[parent]:
-            self._swap(i, parent)
-            self._bubbleup(parent)
+        """Bubble item at index up to its correct position in the heap.
+
+        Parents are moved down into the hole left by the item, which is
+        only written once it reaches its final position.
+        """
+        heap = self._heap
+        d = self._d
+        element = heap[i]
+        key = element._key
+        while i > 0:
+            parent = (i - 1) // d
+            parent_element = heap[parent]
+            if not key < parent_element._key:
+                break
+            heap[i] = parent_element
+            parent_element._index = i
+            i = parent
+        heap[i] = element
+        element._index = i
 
     def _bubbledown(self, i):
-        """Bubble item at index down to its correct position in the heap."""
-        left = 2 * i + 1
-        right = 2 * i + 2
-        minchild = left
-        if right < self._size and self._heap[right] < self._heap[left]:
-            minchild = right
-        if left < self._size and self._heap[i] > self._heap[minchild]:
-            self._swap(i, minchild)
-            self._bubbledown(minchild)
+        """Bubble item at index down to its correct position in the heap.
+
+        The smallest child is moved up into the hole left by the item,
+        which is only written once it reaches its final position.
+        """
+        heap = self._heap
+        d = self._d
+        size = self._size
+        element = heap[i]
+        key = element._key
+        while True:
+            first = d * i + 1
+            if first >= size:
+                break
+            last = first + d
+            if last > size:
+                last = size
+            minchild = first
+            minkey = heap[first]._key
+            for child in range(first + 1, last):
+                child_key = heap[child]._key
+                if child_key < minkey:
+                    minchild = child
+                    minkey = child_key
+            if not minkey < key:
+                break
+            child_element = heap[minchild]
+            heap[i] = child_element
+            child_element._index = i
+            i = minchild
+        heap[i] = element
+        element._index = i
 
     def _swap(self, i, j):
         """Swap the two elements at the given indices."""
@@ -173,9 +311,14 @@ class SearchableAPQ(AdaptablePQ):
     Has lookup function for getting references to items within the queue.
     """
 
-    def __init__(self):
-        """Initialise a new queue."""
-        super().__init__()
+    def __init__(self, d=2):
+        """Initialise a new queue.
+
+        Args:
+            d (int): Number of children of each node in the heap.
+                     (Default: 2)
+        """
+        super().__init__(d)
         self._lookup = {}
 
     def __contains__(self, item):
@@ -200,6 +343,52 @@ class SearchableAPQ(AdaptablePQ):
         self._lookup[value] = element
         return element
 
+    def add_many(self, items):
+        """Add many items to the queue at once.
+
+        Args:
+            items (iterable): (key, value) pairs to add.
+
+        Returns:
+            A list of references to the items within the queue, in order.
+        """
+        elements = super().add_many(items)
+        for element in elements:
+            self._lookup[element._value] = element
+        return elements
+
+    def merge(self, other):
+        """Move every item from another queue into this one.
+
+        Args:
+            other (AdaptablePQ): The queue to merge into this one.
+
+        Raises:
+            ValueError: If other is this queue.
+        """
+        moved = other._heap
+        super().merge(other)
+        for element in moved:
+            self._lookup[element._value] = element
+
+    def _clear(self):
+        """Forget every item, after they were moved to another queue."""
+        super()._clear()
+        self._lookup = {}
+
+    def replace_min(self, key, value):
+        """Remove the highest priority item and add another in its place.
+
+        Returns:
+            A reference to the new item within the queue.
+        """
+        old = self.get_min()
+        element = super().replace_min(key, value)
+        if old is not None:
+            del self._lookup[old[1]]
+        self._lookup[value] = element
+        return element
+
     def remove(self, element):
         """Remove and return the given element from the queue.
 
@@ -213,3 +402,156 @@ class SearchableAPQ(AdaptablePQ):
         if removed is not None:
             del self._lookup[removed[1]]
         return removed
+
+
+class IndexedPQ:
+    """Priority queue of dense integer items with numeric keys.
+
+    Items are integers from 0 up to the capacity, such as vertex ids, so
+    the queue is held in three parallel arrays rather than an Element per
+    item and a lookup dictionary: the key of each item, the heap of items,
+    and the position of each item in the heap. An item is its own
+    reference, so it can be used wherever SearchableAPQ is.
+    """
+
+    def __init__(self, capacity=0):
+        """Initialise a new queue.
+
+        Args:
+            capacity (int): One more than the largest item expected. The
+                            queue grows if larger items are added.
+                            (Default: 0)
+        """
+        self._keys = array("d", [0.0]) * capacity
+        self._position = array("l", [-1]) * capacity
+        self._heap = array("l")
+
+    def __len__(self):
+        """Return the length of the queue."""
+        return len(self._heap)
+
+    def __contains__(self, item):
+        """Return True if item is in the queue, otherwise False."""
+        return 0 <= item < len(self._position) and self._position[item] >= 0
+
+    def __getitem__(self, item):
+        """Get the reference to the item in the queue, or None."""
+        if item in self:
+            return item
+        return None
+
+    def add(self, key, value):
+        """Add an item to the queue with the specified priority.
+
+        Args:
+            key (float): The priority of the item.
+            value (int): The item, which must not already be in the queue.
+
+        Returns:
+            A reference to the item within the queue.
+        """
+        if value >= len(self._position):
+            extra = value + 1 - len(self._position)
+            self._keys.extend(array("d", [0.0]) * extra)
+            self._position.extend(array("l", [-1]) * extra)
+        self._keys[value] = key
+        self._heap.append(value)
+        self._bubbleup(len(self._heap) - 1, value)
+        return value
+
+    def get_min(self):
+        """Return the highest priority item in the queue."""
+        if len(self._heap) == 0:
+            return None
+        item = self._heap[0]
+        return (self._keys[item], item)
+
+    def remove_min(self):
+        """Remove and return the highest priority item in the queue.
+
+        Returns:
+            The (key, value) pair of the highest priority item.
+        """
+        if len(self._heap) == 0:
+            return None
+        return self.remove(self._heap[0])
+
+    def remove(self, element):
+        """Remove and return the given item from the queue.
+
+        Args:
+            element (int): An item already in the queue.
+
+        Returns:
+            The (key, value) pair of the item.
+        """
+        if element not in self:
+            return None
+        heap = self._heap
+        i = self._position[element]
+        last = heap.pop()
+        self._position[element] = -1
+        if last != element:
+            heap[i] = last
+            self._position[last] = i
+            self._rebalance(i)
+        return (self._keys[element], element)
+
+    def get_key(self, element):
+        """Return the current key for an item in the queue."""
+        return self._keys[element]
+
+    def update_key(self, element, newkey):
+        """Update the key of an item in the queue.
+
+        Args:
+            element (int): The item to update the key of.
+            newkey (float): The new key.
+        """
+        if element in self:
+            self._keys[element] = newkey
+            self._rebalance(self._position[element])
+
+    def _rebalance(self, i):
+        """Rebalance the item at index to the correct position."""
+        item = self._heap[i]
+        if i > 0 and self._keys[item] < self._keys[self._heap[(i - 1) // 2]]:
+            self._bubbleup(i, item)
+        else:
+            self._bubbledown(i, item)
+
+    def _bubbleup(self, i, item):
+        """Move item up from index i into its position in the heap."""
+        heap, keys, position = self._heap, self._keys, self._position
+        key = keys[item]
+        while i > 0:
+            parent = (i - 1) // 2
+            parent_item = heap[parent]
+            if not key < keys[parent_item]:
+                break
+            heap[i] = parent_item
+            position[parent_item] = i
+            i = parent
+        heap[i] = item
+        position[item] = i
+
+    def _bubbledown(self, i, item):
+        """Move item down from index i into its position in the heap."""
+        heap, keys, position = self._heap, self._keys, self._position
+        size = len(heap)
+        key = keys[item]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and keys[heap[right]] < keys[heap[child]]:
+                child = right
+            child_item = heap[child]
+            if not keys[child_item] < key:
+                break
+            heap[i] = child_item
+            position[child_item] = i
+            i = child
+        heap[i] = item
+        position[item] = i
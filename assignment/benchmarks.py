@@ -0,0 +1,230 @@
+"""Benchmarks for shortest path searches on synthetic graphs."""
+
+import os
+import tracemalloc
+from random import Random
+from time import perf_counter
+from graph import Graph, QUEUES
+from routemap import RouteMap
+
+
+def grid_graph(rows, cols=None, seed=0):
+    """Return a grid shaped graph with random edge weights.
+
+    Args:
+        rows (int): Number of rows in the grid.
+        cols (int): Number of columns in the grid. (Default: rows)
+        seed (int): Seed for the random weights. (Default: 0)
+    """
+    if cols is None:
+        cols = rows
+    rng = Random(seed)
+    graph = Graph()
+    vertices = [graph.add_vertex(i) for i in range(rows * cols)]
+    for r in range(rows):
+        for c in range(cols):
+            i = r * cols + c
+            if c + 1 < cols:
+                graph.add_edge(vertices[i], vertices[i + 1],
+                               rng.uniform(1, 10))
+            if r + 1 < rows:
+                graph.add_edge(vertices[i], vertices[i + cols],
+                               rng.uniform(1, 10))
+    return graph
+
+
+def random_graph(n, degree, seed=0):
+    """Return a connected random graph with roughly the given mean degree.
+
+    Args:
+        n (int): Number of vertices.
+        degree (int): Average number of edges incident on each vertex.
+        seed (int): Seed for the random edges and weights. (Default: 0)
+    """
+    rng = Random(seed)
+    graph = Graph()
+    vertices = [graph.add_vertex(i) for i in range(n)]
+    # A ring keeps the graph connected
+    for i in range(n):
+        graph.add_edge(vertices[i], vertices[(i + 1) % n], rng.uniform(1, 10))
+    for _ in range(max(0, n * degree // 2 - n)):
+        v1 = vertices[rng.randrange(n)]
+        v2 = vertices[rng.randrange(n)]
+        if v1 is not v2:
+            graph.add_edge(v1, v2, rng.uniform(1, 10))
+    return graph
+
+
+def measure(function, *args, repeat=5, **kwargs):
+    """Return the mean time and the peak memory allocated by a call.
+
+    Args:
+        function (callable): The function to measure.
+        repeat (int): Number of timed calls. (Default: 5)
+
+    Returns:
+        A (seconds, peak_bytes) pair.
+    """
+    start = perf_counter()
+    for _ in range(repeat):
+        function(*args, **kwargs)
+    seconds = (perf_counter() - start) / repeat
+    tracemalloc.start()
+    function(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (seconds, peak)
+
+
+def benchmark_shortest_paths(graphs, repeat=5):
+    """Print the time and peak memory of shortest_paths on each graph.
+
+    Args:
+        graphs (dict): Names mapped to the graphs to search.
+        repeat (int): Number of timed searches per graph. (Default: 5)
+    """
+    print("{:<20}{:>10}{:>10}{:>12}{:>12}".format(
+        "graph", "|V|", "|E|", "time (ms)", "peak (KiB)"))
+    for name, graph in graphs.items():
+        source = graph.vertices()[0]
+        seconds, peak = measure(graph.shortest_paths, source, repeat=repeat)
+        print("{:<20}{:>10}{:>10}{:>12.2f}{:>12.1f}".format(
+            name, graph.num_vertices(), graph.num_edges(), seconds * 1000,
+            peak / 1024))
+
+
+def benchmark_queues(graphs, queues=None, repeat=5):
+    """Print the time of shortest_paths on each graph with each queue.
+
+    Args:
+        graphs (dict): Names mapped to the graphs to search.
+        queues (list): Names of the queues to compare. (Default: all, and
+                       the "lazy" mode)
+        repeat (int): Number of timed searches per graph. (Default: 5)
+    """
+    if queues is None:
+        queues = list(QUEUES) + ["lazy"]
+    print(("{:<20}" + "{:>12}" * len(queues)).format("time (ms)", *queues))
+    for name, graph in graphs.items():
+        source = graph.vertices()[0]
+        times = []
+        for queue in queues:
+            seconds = measure(graph.shortest_paths, source, queue=queue,
+                              repeat=repeat)[0]
+            times.append(seconds * 1000)
+        print(("{:<20}" + "{:>12.2f}" * len(queues)).format(name, *times))
+
+
+class _CountedKey(float):
+    """Float key that counts how often it is compared."""
+
+    comparisons = 0
+
+    def __lt__(self, other):
+        _CountedKey.comparisons += 1
+        return float.__lt__(self, other)
+
+
+class _CountingQueue:
+    """Wrap a queue to count the operations made on it."""
+
+    def __init__(self, queue, counts):
+        self._queue = queue
+        self._counts = counts
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __contains__(self, item):
+        return item in self._queue
+
+    def __getitem__(self, item):
+        return self._queue[item]
+
+    def get_key(self, element):
+        return self._queue.get_key(element)
+
+    def add(self, key, value):
+        self._counts["add"] += 1
+        return self._queue.add(_CountedKey(key), value)
+
+    def remove_min(self):
+        self._counts["remove_min"] += 1
+        return self._queue.remove_min()
+
+    def update_key(self, element, newkey):
+        self._counts["update_key"] += 1
+        self._queue.update_key(element, _CountedKey(newkey))
+
+
+def count_operations(graph, source, queue):
+    """Return the number of each queue operation made by shortest_paths.
+
+    Args:
+        graph (Graph): The graph to search.
+        source (Vertex): The vertex to search from.
+        queue (str): Name of the queue in QUEUES.
+
+    Returns:
+        A dictionary of the numbers of add, remove_min and update_key calls
+        and of key comparisons. Queues that copy keys into arrays, such as
+        "indexed", cannot have their comparisons counted and report 0.
+    """
+    counts = {"add": 0, "remove_min": 0, "update_key": 0}
+    factory = QUEUES[queue]
+
+    def counting(capacity):
+        return _CountingQueue(factory(capacity), counts)
+
+    _CountedKey.comparisons = 0
+    graph.shortest_paths(source, queue=counting)
+    counts["comparisons"] = _CountedKey.comparisons
+    return counts
+
+
+def benchmark_queue_operations(graphs, queues=None, repeat=5):
+    """Print the time and operations of shortest_paths with each queue.
+
+    Args:
+        graphs (dict): Names mapped to the graphs to search.
+        queues (list): Names of the queues to compare. (Default: all)
+        repeat (int): Number of timed searches per graph. (Default: 5)
+    """
+    if queues is None:
+        queues = list(QUEUES)
+    print("{:<20}{:<10}{:>11}{:>10}{:>12}{:>12}{:>13}".format(
+        "graph", "queue", "time (ms)", "add", "remove_min", "update_key",
+        "comparisons"))
+    for name, graph in graphs.items():
+        source = graph.vertices()[0]
+        for queue in queues:
+            seconds = measure(graph.shortest_paths, source, queue=queue,
+                              repeat=repeat)[0]
+            counts = count_operations(graph, source, queue)
+            print("{:<20}{:<10}{:>11.2f}{:>10}{:>12}{:>12}{:>13}".format(
+                name, queue, seconds * 1000, counts["add"],
+                counts["remove_min"], counts["update_key"],
+                counts["comparisons"]))
+
+
+def main():
+    graphs = {
+        "grid 100x100": grid_graph(100),
+        "random d=4": random_graph(10000, 4),
+        "random d=16": random_graph(10000, 16),
+    }
+    if os.path.exists("corkCityData.txt"):
+        graphs["cork city"] = RouteMap("corkCityData.txt")
+    benchmark_shortest_paths(graphs)
+    print()
+    benchmark_queues(graphs)
+    print()
+    benchmark_queue_operations(graphs, ["binary", "4-ary", "pairing"])
+    print()
+    densities = {"random d={}".format(degree): random_graph(10000, degree)
+                 for degree in (3, 6, 12, 24, 48)}
+    benchmark_queues(densities, ["binary", "indexed", "lazy"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,42 @@
 """Undirected Graph ADT."""
 
-from apq import SearchableAPQ
+from apq import IndexedPQ, SearchableAPQ
+from array import array
+from heapq import heappop, heappush
+from monotoneq import BucketQueue, RadixHeap
+from pairingheap import SearchablePairingHeap
+from sys import getsizeof
 from time import time
+from topk import TopK
+
+
+# Priority queues shortest_paths can use, each made from the number of
+# vertex ids in the graph
+QUEUES = {
+    "binary": lambda capacity: SearchableAPQ(),
+    "4-ary": lambda capacity: SearchableAPQ(4),
+    "indexed": IndexedPQ,
+    "radix": lambda capacity: RadixHeap(),
+    "dial": lambda capacity: BucketQueue(),
+    "pairing": lambda capacity: SearchablePairingHeap(),
+}
 
 
 class Vertex:
     """Class to represent a Vertex as part of a Graph."""
 
-    def __init__(self, element):
+    __slots__ = ("_element", "_index")
+
+    def __init__(self, element, index=None):
         """Initialise a new vertex.
 
         Args:
             element (any): The data associated with the vertex.
+            index (int): Dense integer id of the vertex within its graph.
+                         (Default: None)
         """
         self._element = element
+        self._index = index
 
     def __str__(self):
         """Return the string representation of the vertex."""
@@ -47,10 +70,16 @@ class Vertex:
         """Return the element associated with the vertex."""
         return self._element
 
+    def index(self):
+        """Return the integer id of the vertex within its graph."""
+        return self._index
+
 
 class Edge:
     """Class to represent an Edge between two vertices in a Graph."""
 
+    __slots__ = ("_edge", "_element")
+
     def __init__(self, v1, v2, element):
         """Initialise a new edge.
 
@@ -92,6 +121,131 @@ class Edge:
         return None
 
 
+class ShortestPaths:
+    """Result of a shortest path search from a single source vertex.
+
+    Costs and predecessors are held in flat arrays indexed by vertex id, so
+    no tuple is built per vertex unless one is asked for.
+    """
+
+    def __init__(self, vertices, source, cost, predecessor, order):
+        """Initialise a new result.
+
+        Args:
+            vertices (list): The graph's vertices indexed by id.
+            source (Vertex): The vertex the search started from.
+            cost (array): Cost to each vertex, indexed by vertex id.
+            predecessor (array): Id of each vertex's predecessor, or -1.
+            order (array): Ids of the settled vertices in settled order.
+        """
+        self._vertices = vertices
+        self._source = source
+        self._cost = cost
+        self._predecessor = predecessor
+        self._order = order
+        self._settled = bytearray(len(cost))
+        for i in order:
+            self._settled[i] = 1
+
+    def __len__(self):
+        """Return the number of vertices reached from the source."""
+        return len(self._order)
+
+    def __contains__(self, w):
+        """Return True if w was reached from the source, otherwise False."""
+        i = self._id(w)
+        return i is not None and self._settled[i] == 1
+
+    def __getitem__(self, w):
+        """Return the (cost, predecessor) pair for w.
+
+        Raises:
+            KeyError: If w was not reached from the source.
+        """
+        if w not in self:
+            raise KeyError(w)
+        return (self._cost[w.index()], self.predecessor(w))
+
+    def __iter__(self):
+        """Iterate over the reached vertices in the order they were settled."""
+        vertices = self._vertices
+        return (vertices[i] for i in self._order)
+
+    def _id(self, w):
+        """Return the id of w if it belongs to the searched graph."""
+        i = getattr(w, "_index", None)
+        if i is None or i >= len(self._cost) or self._vertices[i] is not w:
+            return None
+        return i
+
+    def items(self):
+        """Return the (vertex, (cost, predecessor)) pairs of the result."""
+        return ((vertex, self[vertex]) for vertex in self)
+
+    def source(self):
+        """Return the vertex the search started from."""
+        return self._source
+
+    def cost(self, w):
+        """Return the cost of the shortest path to w, or None if unreached."""
+        if w not in self:
+            return None
+        return self._cost[w.index()]
+
+    def predecessor(self, w):
+        """Return the vertex before w on its shortest path, if any."""
+        if w not in self:
+            return None
+        i = self._predecessor[w.index()]
+        if i < 0:
+            return None
+        return self._vertices[i]
+
+    def path_to(self, w):
+        """Return the shortest path from the source to w.
+
+        Args:
+            w (Vertex): End vertex in the path.
+
+        Returns:
+            A list of (vertex, cost) pairs from the source to w, or an empty
+            list if w was not reached.
+        """
+        if w not in self:
+            return []
+        vertices = self._vertices
+        cost = self._cost
+        predecessor = self._predecessor
+        path = []
+        i = w.index()
+        while i >= 0:
+            path.append((vertices[i], cost[i]))
+            i = predecessor[i]
+        path.reverse()
+        return path
+
+
+def _find(parent, v):
+    """Return the root of v in a component index, halving the path."""
+    while parent[v] is not v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
+
+
+def _union(parent, size, v1, v2):
+    """Merge the components containing v1 and v2 by size."""
+    root1 = _find(parent, v1)
+    root2 = _find(parent, v2)
+    if root1 is root2:
+        return
+    if size[root1] < size[root2]:
+        root1, root2 = root2, root1
+    parent[root2] = root1
+    size[root1] += size[root2]
+    del size[root2]
+
+
 class Graph:
     """Undirected Graph."""
 
@@ -103,7 +257,11 @@ class Graph:
                             (Default: None)
         """
         self._adj_map = {}
-        self._vertices_lookup = {}
+        self._label_ids = {}
+        self._vertex_ids = []
+        self._component_parent = {}
+        self._component_size = {}
+        self._components_stale = False
         if filename:
             self.read_graph(filename)
 
@@ -189,17 +347,39 @@ class Graph:
                 highest_vertex = vertex
         return highest_vertex
 
+    def top_k_by_degree(self, k):
+        """Return the k vertices with the highest degree.
+
+        Args:
+            k (int): Number of vertices to return.
+
+        Returns:
+            A list of (vertex, degree) pairs, highest degree first.
+        """
+        selector = TopK(k)
+        for vertex in self._adj_map:
+            selector.push(self.degree(vertex), vertex)
+        return [(vertex, degree) for degree, vertex in selector.items()]
+
     def get_vertex_by_label(self, element):
         """Return the first vertex that matches element.
 
         Args:
             element (Element): The element to search for.
         """
-        try:
-            vertex = self._vertices_lookup[element]
-        except KeyError:
-            vertex = None
-        return vertex
+        i = self._label_ids.get(element)
+        if i is None:
+            return None
+        return self._vertex_ids[i]
+
+    def _vertex_id(self, v):
+        """Return the id of v if it is a vertex in this graph, else None."""
+        i = getattr(v, "_index", None)
+        if i is None or i >= len(self._vertex_ids):
+            return None
+        if self._vertex_ids[i] is not v:
+            return None
+        return i
 
     def add_vertex(self, element):
         """Add and return a new vertex.
@@ -207,9 +387,13 @@ class Graph:
         Args:
             element (any): The data associated with the vertex.
         """
-        vertex = Vertex(element)
+        vertex = Vertex(element, len(self._vertex_ids))
+        self._vertex_ids.append(vertex)
         self._adj_map[vertex] = {}
-        self._vertices_lookup[element] = vertex
+        # Share the id object with the vertex rather than making another
+        self._label_ids[element] = vertex.index()
+        self._component_parent[vertex] = vertex
+        self._component_size[vertex] = 1
         return vertex
 
     def add_vertex_if_new(self, element):
@@ -218,8 +402,9 @@ class Graph:
         Args:
             element (any): The data associated with the vertex.
         """
-        if element in self._vertices_lookup:
-            return self._vertices_lookup[element]
+        vertex = self.get_vertex_by_label(element)
+        if vertex is not None:
+            return vertex
         return self.add_vertex(element)
 
     def add_edge(self, v1, v2, element):
@@ -237,6 +422,8 @@ class Graph:
         new_edge = Edge(v1, v2, element)
         self._adj_map[v1][v2] = new_edge
         self._adj_map[v2][v1] = new_edge
+        if not self._components_stale:
+            _union(self._component_parent, self._component_size, v1, v2)
         return new_edge
 
     def remove_vertex(self, v):
@@ -249,6 +436,10 @@ class Graph:
             for vertex in self._adj_map[v]:
                 del self._adj_map[vertex][v]
             del self._adj_map[v]
+            self._vertex_ids[v.index()] = None
+            if self._label_ids.get(v.element()) == v.index():
+                del self._label_ids[v.element()]
+            self._components_stale = True
 
     def remove_edge(self, e):
         """Remove edge e.
@@ -260,6 +451,70 @@ class Graph:
         v2 = e.end()
         del self._adj_map[v1][v2]
         del self._adj_map[v2][v1]
+        self._components_stale = True
+
+    def component(self, v):
+        """Return the representative vertex of the component containing v.
+
+        Two vertices are in the same component exactly when they have the
+        same representative.
+
+        Args:
+            v (Vertex): The vertex to find the component of.
+
+        Returns:
+            The representative vertex, or None if v is not in the graph.
+        """
+        if v not in self._adj_map:
+            return None
+        if self._components_stale:
+            self._rebuild_components()
+        return _find(self._component_parent, v)
+
+    def connected(self, v, w):
+        """Return True if there is a path between v and w, otherwise False.
+
+        Args:
+            v (Vertex): The first vertex.
+            w (Vertex): The second vertex.
+        """
+        component = self.component(v)
+        return component is not None and component == self.component(w)
+
+    def _rebuild_components(self):
+        """Rebuild the component index from scratch after removals.
+
+        The new index is built aside and swapped in before the flag is
+        cleared, so readers on other threads never see it half built.
+        """
+        parent = {vertex: vertex for vertex in self._adj_map}
+        size = {vertex: 1 for vertex in self._adj_map}
+        for edge in self.edges():
+            _union(parent, size, edge.start(), edge.end())
+        self._component_parent = parent
+        self._component_size = size
+        self._components_stale = False
+
+    def memory_report(self):
+        """Return the approximate memory used by each part of the graph.
+
+        Returns:
+            A dictionary mapping component names to sizes in bytes.
+        """
+        adjacency = getsizeof(self._adj_map)
+        vertices = getsizeof(self._vertex_ids)
+        for vertex, neighbours in self._adj_map.items():
+            adjacency += getsizeof(neighbours)
+            vertices += getsizeof(vertex)
+        edge_bytes = 0
+        for edge in self.edges():
+            edge_bytes += getsizeof(edge) + getsizeof(edge.vertices())
+            edge_bytes += getsizeof(edge.element())
+        labels = getsizeof(self._label_ids)
+        for label in self._label_ids:
+            labels += getsizeof(label)
+        return {"adjacency": adjacency, "vertices": vertices,
+                "edges": edge_bytes, "labels": labels}
 
     def depth_first_search(self, v):
         """Return a dictionary of the depth-first search from v.
@@ -339,45 +594,198 @@ class Graph:
                     central = vertex
         return central
 
-    def shortest_paths(self, v):
+    def shortest_paths(self, v, max_cost=None, queue="binary", limit=None,
+                       target=None):
         """Dijkstra's Algorithm for finding shortest paths to other vertices.
 
         Args:
             v (Vertex): Start vertex to find paths from.
+            max_cost (float): Stop once every remaining vertex costs more
+                              than this to reach. (Default: None)
+            queue (str or callable): Name of the priority queue to use, one
+                                     of the keys of QUEUES, or "lazy" to
+                                     push duplicate entries instead of
+                                     updating keys. A factory taking the
+                                     number of vertices, like the values
+                                     of QUEUES, can be given instead.
+                                     (Default: "binary")
+            limit (int): Stop once this many vertices, including v, have
+                         been settled. (Default: None)
+            target (Vertex): Stop once the path to this vertex is found.
+                             (Default: None)
 
         Returns:
-            A dictionary with vertices as keys and (cost, predecessor) pairs
-            as values.
+            A ShortestPaths result, which maps each reached vertex to its
+            (cost, predecessor) pair.
         """
-        opened = SearchableAPQ()
-        closed = {}
-        predecessors = {v: None}
-
-        opened.add(0, v)
+        if queue == "lazy":
+            return self._lazy_shortest_paths(v, max_cost, limit, target)
+        vertices = self._vertex_ids
+        n = len(vertices)
+        cost = array("d", [0.0]) * n
+        predecessor = array("l", [-1]) * n
+        closed = bytearray(n)
+        order = array("l")
+        target_id = -1 if target is None else target.index()
+        factory = QUEUES[queue] if isinstance(queue, str) else queue
+        opened = factory(n)
+
+        opened.add(0, v.index())
         while len(opened) > 0:
-            cost, vertex = opened.remove_min()
-            predecessor = predecessors.pop(vertex)
-
-            closed[vertex] = (cost, predecessor)
-            for edge in self.get_edges(vertex):
-                opposite_vertex = edge.opposite(vertex)
-                if opposite_vertex not in closed:
-                    new_cost = cost + edge.element()
-                    if opposite_vertex not in opened:
+            vertex_cost, i = opened.remove_min()
+            if max_cost is not None and vertex_cost > max_cost:
+                break
+            cost[i] = vertex_cost
+            closed[i] = 1
+            order.append(i)
+            if limit is not None and len(order) >= limit:
+                break
+            if i == target_id:
+                break
+            neighbours = self._neighbours(vertices[i])
+            if len(vertices) > n:
+                # Vertices were added during the search, e.g. paged in
+                extra = len(vertices) - n
+                cost.extend(array("d", [0.0]) * extra)
+                predecessor.extend(array("l", [-1]) * extra)
+                closed.extend(bytearray(extra))
+                n = len(vertices)
+            for opposite_vertex, edge in neighbours:
+                j = opposite_vertex.index()
+                if not closed[j]:
+                    new_cost = vertex_cost + edge.element()
+                    element = opened[j]
+                    if element is None:
                         # Set the current vertex's predecessor
-                        predecessors[opposite_vertex] = vertex
-                        # Add the current vertex to opened with it's cost
-                        opened.add(new_cost, opposite_vertex)
-                    else:
-                        element = opened[opposite_vertex]
-                        old_cost = opened.get_key(element)
-                        # If the new cost is better than the old cost
-                        if new_cost < old_cost:
-                            # Replace the old predecessor with current vertex
-                            predecessors[opposite_vertex] = vertex
-                            # Update the cost to current vertex in opened
-                            opened.update_key(element, new_cost)
-        return closed
+                        predecessor[j] = i
+                        # Add the opposite vertex to opened with it's cost
+                        opened.add(new_cost, j)
+                    elif new_cost < opened.get_key(element):
+                        # Replace the old predecessor with current vertex
+                        predecessor[j] = i
+                        # Update the cost to opposite vertex in opened
+                        opened.update_key(element, new_cost)
+        return ShortestPaths(vertices, v, cost, predecessor, order)
+
+    def _lazy_shortest_paths(self, v, max_cost=None, limit=None,
+                             target=None):
+        """Dijkstra's Algorithm with lazy deletion instead of decrease-key.
+
+        Every improvement pushes a new (cost, id) entry onto a plain list
+        heap, and entries for vertices already closed are skipped when
+        popped, so no queue lookups or key updates are needed.
+        """
+        vertices = self._vertex_ids
+        n = len(vertices)
+        cost = array("d", [float("inf")]) * n
+        predecessor = array("l", [-1]) * n
+        closed = bytearray(n)
+        order = array("l")
+        target_id = -1 if target is None else target.index()
+
+        source = v.index()
+        cost[source] = 0.0
+        opened = [(0.0, source)]
+        while opened:
+            vertex_cost, i = heappop(opened)
+            if closed[i]:
+                # A stale entry, the vertex was reached more cheaply
+                continue
+            if max_cost is not None and vertex_cost > max_cost:
+                break
+            closed[i] = 1
+            order.append(i)
+            if limit is not None and len(order) >= limit:
+                break
+            if i == target_id:
+                break
+            neighbours = self._neighbours(vertices[i])
+            if len(vertices) > n:
+                # Vertices were added during the search, e.g. paged in
+                extra = len(vertices) - n
+                cost.extend(array("d", [float("inf")]) * extra)
+                predecessor.extend(array("l", [-1]) * extra)
+                closed.extend(bytearray(extra))
+                n = len(vertices)
+            for opposite_vertex, edge in neighbours:
+                j = opposite_vertex.index()
+                if not closed[j]:
+                    new_cost = vertex_cost + edge.element()
+                    if new_cost < cost[j]:
+                        cost[j] = new_cost
+                        predecessor[j] = i
+                        heappush(opened, (new_cost, j))
+        return ShortestPaths(vertices, v, cost, predecessor, order)
+
+    def k_nearest(self, v, k, queue="binary"):
+        """Return the k vertices that cost the least to reach from v.
+
+        The search stops as soon as k vertices besides v are settled, so
+        only the part of the graph around v is explored.
+
+        Args:
+            v (Vertex): Vertex to measure costs from.
+            k (int): Number of vertices to return.
+            queue (str or callable): The priority queue to use, as for
+                         shortest_paths. (Default: "binary")
+
+        Returns:
+            A list of up to k (vertex, cost) pairs, cheapest first.
+        """
+        if k <= 0:
+            return []
+        paths = self.shortest_paths(v, queue=queue, limit=k + 1)
+        return [(vertex, paths.cost(vertex)) for vertex in paths
+                if vertex is not v]
+
+    def costs_to(self, v, targets, max_cost=None):
+        """Return the costs of the shortest paths from v to a few targets.
+
+        shortest_paths allocates arrays over every vertex id for each
+        search, while this keeps its state in dicts, so a small search on a
+        large graph costs only as much as the area it explores. The search
+        stops once every target is settled.
+
+        Args:
+            v (Vertex): Start vertex to find paths from.
+            targets (iterable): The vertices to find the costs to.
+            max_cost (float): Stop once every remaining vertex costs more
+                              than this to reach. (Default: None)
+
+        Returns:
+            A dictionary mapping each reached target to its cost.
+        """
+        vertices = self._vertex_ids
+        remaining = set(targets)
+        found = {}
+        best = {v.index(): 0.0}
+        closed = set()
+        opened = [(0.0, v.index())]
+        while opened and remaining:
+            vertex_cost, i = heappop(opened)
+            if i in closed:
+                # A stale entry, the vertex was reached more cheaply
+                continue
+            if max_cost is not None and vertex_cost > max_cost:
+                break
+            closed.add(i)
+            vertex = vertices[i]
+            if vertex in remaining:
+                remaining.discard(vertex)
+                found[vertex] = vertex_cost
+            for opposite_vertex, edge in self._neighbours(vertex):
+                j = opposite_vertex.index()
+                if j in closed:
+                    continue
+                new_cost = vertex_cost + edge.element()
+                if j not in best or new_cost < best[j]:
+                    best[j] = new_cost
+                    heappush(opened, (new_cost, j))
+        return found
+
+    def _neighbours(self, v):
+        """Return the (opposite vertex, edge) pairs for the edges on v."""
+        return self._adj_map[v].items()
 
     def read_graph(self, filename):
         """Build a graph from the given file.
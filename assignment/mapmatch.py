@@ -0,0 +1,200 @@
+"""Streaming map-matching of GPS traces onto a Route Map."""
+
+from math import floor
+from routemap import RouteMap
+
+
+class _Node:
+    """A candidate vertex for one point of a trace, in the Viterbi lattice."""
+
+    __slots__ = ("index", "vertex", "score", "parent")
+
+    def __init__(self, index, vertex, score, parent):
+        self.index = index
+        self.vertex = vertex
+        self.score = score
+        self.parent = parent
+
+
+class MapMatcher:
+    """Match streams of GPS points to vertices on a route map.
+
+    Each point is matched to one of the vertices within radius of it. The
+    most likely sequence is found with the Viterbi algorithm, scoring each
+    candidate by its distance from the point and each step between
+    candidates by the cost of the route between them. Points are matched
+    online: a point is emitted as soon as every surviving sequence agrees on
+    it, or when it falls out of the sliding window, so memory is bounded by
+    the window rather than the length of the trace.
+    """
+
+    def __init__(self, routemap, radius, max_route_cost, max_candidates=5,
+                 sigma=None, beta=1.0, window=10):
+        """Initialise a new map matcher.
+
+        Args:
+            routemap (RouteMap): The route map to match onto.
+            radius (float): Only vertices this close to a point are
+                            candidates, in coordinate units.
+            max_route_cost (float): Bound on the searches between the
+                                    candidates of consecutive points.
+            max_candidates (int): Most candidates kept per point.
+                                  (Default: 5)
+            sigma (float): Spread of the GPS error. (Default: radius / 2)
+            beta (float): Route cost per unit of transition penalty.
+                          (Default: 1.0)
+            window (int): Most points held before forcing a decision.
+                          (Default: 10)
+        """
+        self._routemap = routemap
+        self._radius = radius
+        self._max_route_cost = max_route_cost
+        self._max_candidates = max_candidates
+        self._sigma = sigma if sigma is not None else radius / 2
+        self._beta = beta
+        self._window = window
+        self._grid = {}
+        for vertex in routemap.vertices():
+            cell = self._cell(routemap.get_coordinates(vertex))
+            self._grid.setdefault(cell, []).append(vertex)
+
+    def _cell(self, coordinates):
+        """Return the grid cell containing the coordinates."""
+        return (floor(coordinates[0] / self._radius),
+                floor(coordinates[1] / self._radius))
+
+    def candidates(self, point):
+        """Return the closest vertices within radius of a point.
+
+        Args:
+            point (tuple): A (latitude, longitude) pair.
+
+        Returns:
+            A list of up to max_candidates (vertex, distance) pairs, closest
+            first.
+        """
+        routemap = self._routemap
+        row, col = self._cell(point)
+        found = []
+        for r in (row - 1, row, row + 1):
+            for c in (col - 1, col, col + 1):
+                for vertex in self._grid.get((r, c), ()):
+                    distance = routemap.distance(
+                        point, routemap.get_coordinates(vertex))
+                    if distance <= self._radius:
+                        found.append((vertex, distance))
+        found.sort(key=lambda pair: pair[1])
+        return found[:self._max_candidates]
+
+    def _emission(self, distance):
+        """Return the penalty for a candidate at distance from its point."""
+        return 0.5 * (distance / self._sigma) ** 2
+
+    def _step(self, column, index, candidates):
+        """Return the lattice column for candidates following column."""
+        best = {}
+        targets = [vertex for vertex, distance in candidates]
+        for node in column:
+            costs = self._routemap.costs_to(node.vertex, targets,
+                                            self._max_route_cost)
+            for vertex, distance in candidates:
+                route_cost = costs.get(vertex)
+                if route_cost is None:
+                    continue
+                score = (node.score + route_cost / self._beta
+                         + self._emission(distance))
+                if vertex not in best or score < best[vertex].score:
+                    best[vertex] = _Node(index, vertex, score, node)
+        return list(best.values())
+
+    def match(self, points):
+        """Match a stream of GPS points to vertices.
+
+        Args:
+            points (iterable): (latitude, longitude) pairs in trace order.
+
+        Returns:
+            A generator of (index, vertex) pairs, where index is the
+            position of the point in the stream. Points with no candidate
+            within radius are skipped. If no route joins consecutive points
+            the match restarts from the later point.
+        """
+        column = []
+        pending = []
+        for index, point in enumerate(points):
+            candidates = self.candidates(point)
+            if not candidates:
+                continue
+            if column:
+                next_column = self._step(column, index, candidates)
+                if not next_column:
+                    # No route from the previous point, so restart here
+                    for pair in self._flush(pending, column):
+                        yield pair
+                    pending = []
+                column = next_column
+            if not column:
+                column = [_Node(index, vertex, self._emission(distance),
+                                None) for vertex, distance in candidates]
+            pending.append(index)
+            while pending:
+                agreed = self._agreed(column, len(pending))
+                if agreed is None and len(pending) <= self._window:
+                    break
+                if agreed is None:
+                    best = min(column, key=lambda node: node.score)
+                    agreed = self._ancestor(best, len(pending) - 1)
+                    column = [node for node in column
+                              if self._ancestor(node, len(pending) - 1)
+                              is agreed]
+                # Older nodes are no longer needed by any sequence
+                agreed.parent = None
+                yield (agreed.index, agreed.vertex)
+                pending.pop(0)
+        for pair in self._flush(pending, column):
+            yield pair
+
+    def _ancestor(self, node, steps):
+        """Return the node steps points before node in its sequence."""
+        for _ in range(steps):
+            node = node.parent
+        return node
+
+    def _agreed(self, column, depth):
+        """Return the oldest pending node if every sequence shares it."""
+        agreed = None
+        for node in column:
+            ancestor = self._ancestor(node, depth - 1)
+            if agreed is None:
+                agreed = ancestor
+            elif ancestor is not agreed:
+                return None
+        return agreed
+
+    def _flush(self, pending, column):
+        """Yield the best sequence through the pending points."""
+        if not pending:
+            return
+        node = min(column, key=lambda node: node.score)
+        matched = []
+        for _ in pending:
+            matched.append((node.index, node.vertex))
+            node = node.parent
+        matched.reverse()
+        for pair in matched:
+            yield pair
+
+
+def main():
+    routemap = RouteMap("corkCityData.txt")
+    matcher = MapMatcher(routemap, radius=0.0005, max_route_cost=300)
+    start = routemap.get_vertex_by_label(1669466540)
+    end = routemap.get_vertex_by_label(1147697924)
+    trace = [routemap.get_coordinates(vertex)
+             for vertex, cost in routemap.sp(start, end)]
+    for index, vertex in matcher.match(iter(trace)):
+        print("{}\t{}".format(index, vertex))
+
+
+if __name__ == "__main__":
+    main()
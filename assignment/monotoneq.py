@@ -0,0 +1,300 @@
+"""Monotone priority queues for Dijkstra's Algorithm.
+
+A monotone queue only accepts keys that are not less than the last minimum
+it returned, which is always the case for the costs in Dijkstra's
+Algorithm. Both queues here have the same interface as SearchableAPQ.
+"""
+
+from operator import attrgetter
+from random import Random
+from struct import pack, unpack
+from apq import Element, SearchableAPQ
+
+
+_element_key = attrgetter("_key")
+
+
+def _float_bits(key):
+    """Return the bits of a non-negative float, which sort like the float."""
+    return unpack("<Q", pack("<d", key))[0]
+
+
+class _MonotoneQueue:
+    """Base for queues that keep their elements in buckets of keys."""
+
+    def __init__(self):
+        """Initialise a new queue."""
+        self._buckets = {}
+        self._lookup = {}
+        self._last = 0.0
+
+    def __len__(self):
+        """Return the length of the queue."""
+        return len(self._lookup)
+
+    def __contains__(self, item):
+        """Return True if item is in the queue, otherwise False."""
+        return item in self._lookup
+
+    def __getitem__(self, item):
+        """Get the reference to the item in the queue, or None."""
+        return self._lookup.get(item)
+
+    def _check(self, key):
+        """Raise ValueError if the key is below the last minimum."""
+        if key < self._last:
+            raise ValueError("Key {} is less than the last minimum {}".format(
+                key, self._last))
+
+    def _advance(self, key):
+        """Make key, the key of the minimum being removed, the last minimum."""
+        self._last = key
+
+    def _place(self, element):
+        """Put an element into the bucket for its key."""
+        bucket = self._bucket_of(element._key)
+        element._index = bucket
+        self._buckets.setdefault(bucket, {})[element._value] = element
+
+    def _unplace(self, element):
+        """Take an element out of its bucket."""
+        bucket = self._buckets[element._index]
+        del bucket[element._value]
+        if not bucket:
+            del self._buckets[element._index]
+
+    def add(self, key, value):
+        """Add an item to the queue with the specified priority.
+
+        Raises:
+            ValueError: If key is less than the last minimum removed.
+
+        Returns:
+            A reference to the item within the queue.
+        """
+        self._check(key)
+        element = Element(key, value, None)
+        self._place(element)
+        self._lookup[value] = element
+        return element
+
+    def get_min(self):
+        """Return the highest priority item in the queue."""
+        element = self._min_element()
+        if element is not None:
+            return (element._key, element._value)
+
+    def remove_min(self):
+        """Remove and return the highest priority item in the queue.
+
+        Returns:
+            The (key, value) pair of the highest priority item.
+        """
+        element = self._min_element()
+        if element is not None:
+            self._advance(element._key)
+            return self.remove(element)
+
+    def remove(self, element):
+        """Remove and return the given element from the queue.
+
+        Args:
+            element (Element): An element already in the queue.
+
+        Returns:
+            The (key, value) pair from the element.
+        """
+        if element._key is None and element._value is None:
+            return None
+        self._unplace(element)
+        del self._lookup[element._value]
+        key, value = element._key, element._value
+        element._wipe()
+        return (key, value)
+
+    def get_key(self, element):
+        """Return the current key for element."""
+        return element._key
+
+    def update_key(self, element, newkey):
+        """Update the key of the element.
+
+        Raises:
+            ValueError: If newkey is less than the last minimum removed.
+        """
+        if element._key is not None and element._value is not None:
+            self._check(newkey)
+            self._unplace(element)
+            element._key = newkey
+            self._place(element)
+
+
+class RadixHeap(_MonotoneQueue):
+    """Radix heap for non-negative float keys.
+
+    An element is kept in bucket b when the highest bit in which its key
+    differs from the last minimum is bit b - 1, so bucket 0 holds the keys
+    equal to the last minimum. Each element only moves to lower buckets,
+    at most 64 times in all.
+    """
+
+    def __init__(self):
+        """Initialise a new queue."""
+        super().__init__()
+        self._last_bits = 0
+
+    def _bucket_of(self, key):
+        return (_float_bits(key) ^ self._last_bits).bit_length()
+
+    def _advance(self, key):
+        """Make key the last minimum and spread out the bucket holding it.
+
+        The keys in higher buckets share the bits of the new last minimum
+        above their bucket, so only the bucket holding key moves.
+        """
+        if key == self._last:
+            return
+        bucket = self._buckets.pop(self._bucket_of(key))
+        self._last = key
+        self._last_bits = _float_bits(key)
+        for element in bucket.values():
+            self._place(element)
+
+    def _min_element(self):
+        """Return an element with the minimum key, or None if empty."""
+        buckets = self._buckets
+        if not buckets:
+            return None
+        if 0 in buckets:
+            return next(iter(buckets[0].values()))
+        # Every key in the lowest bucket is below those in higher buckets
+        return min(buckets[min(buckets)].values(), key=_element_key)
+
+
+class BucketQueue(_MonotoneQueue):
+    """Bucket queue (Dial's Algorithm) over keys quantized to a resolution.
+
+    Keys k with the same k // resolution share a bucket. Buckets are taken
+    lowest first, and the minimum within a bucket is found by scanning it,
+    so results are exact for any keys. A resolution of around a tenth of
+    the typical edge weight keeps the buckets small without making many
+    empty ones to step over.
+    """
+
+    def __init__(self, resolution=0.1):
+        """Initialise a new queue.
+
+        Args:
+            resolution (float): Width of the range of keys in each bucket.
+                                (Default: 0.1)
+        """
+        super().__init__()
+        self._resolution = resolution
+        self._cursor = 0
+
+    def _bucket_of(self, key):
+        return int(key // self._resolution)
+
+    def _place(self, element):
+        """Put an element into the bucket for its key."""
+        super()._place(element)
+        # Keys from the last minimum up may be added before the current
+        # minimum is removed, so the cursor moves back to them
+        if element._index < self._cursor:
+            self._cursor = element._index
+
+    def _min_element(self):
+        """Return an element with the minimum key, or None if empty."""
+        buckets = self._buckets
+        if not buckets:
+            return None
+        if self._cursor not in buckets:
+            # Step over a few empty buckets, as the next key is usually
+            # close, before falling back to searching all of them
+            cursor = self._cursor + 1
+            limit = cursor + len(buckets)
+            while cursor not in buckets and cursor < limit:
+                cursor += 1
+            if cursor not in buckets:
+                cursor = min(buckets)
+            self._cursor = cursor
+        return min(buckets[self._cursor].values(), key=_element_key)
+
+
+def _check_against_apq(queue, operations=20000, seed=0):
+    """Apply random operations to queue and a SearchableAPQ, comparing them.
+
+    Keys are drawn at or above the last minimum removed, as Dijkstra's
+    Algorithm does, and distinct, so both queues must agree exactly.
+    """
+    rng = Random(seed)
+    expected = SearchableAPQ()
+    values = []
+    positions = {}
+
+    def forget(value):
+        # Swap the last value into the place of the removed one
+        i = positions.pop(value)
+        moved = values.pop()
+        if moved != value:
+            values[i] = moved
+            positions[moved] = i
+
+    last = 0.0
+    for i in range(operations):
+        choice = rng.random()
+        if choice < 0.4 or not values:
+            key = last + rng.random() * 10
+            queue.add(key, i)
+            expected.add(key, i)
+            positions[i] = len(values)
+            values.append(i)
+        elif choice < 0.55:
+            assert queue.get_min() == expected.get_min()
+        elif choice < 0.75:
+            pair = expected.remove_min()
+            assert queue.remove_min() == pair
+            forget(pair[1])
+            last = pair[0]
+        elif choice < 0.9:
+            value = values[rng.randrange(len(values))]
+            key = last + rng.random() * 10
+            queue.update_key(queue[value], key)
+            expected.update_key(expected[value], key)
+            assert queue.get_key(queue[value]) == key
+        else:
+            value = values[rng.randrange(len(values))]
+            assert queue.remove(queue[value]) == expected.remove(
+                expected[value])
+            forget(value)
+        assert len(queue) == len(expected)
+    while values:
+        pair = expected.remove_min()
+        assert queue.remove_min() == pair
+        forget(pair[1])
+    assert len(queue) == 0 and queue.remove_min() is None
+
+
+def main():
+    for name, factory in (("radix", RadixHeap), ("dial", BucketQueue),
+                          ("dial 5.0", lambda: BucketQueue(5.0))):
+        # Looking at the minimum must not raise the floor for new keys
+        queue = factory()
+        queue.add(5, "a")
+        queue.add(10, "b")
+        assert queue.get_min() == (5, "a")
+        queue.add(3, "c")
+        assert queue.remove_min() == (3, "c")
+        try:
+            queue.add(2, "d")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("key below the last minimum was added")
+        for seed in range(5):
+            _check_against_apq(factory(), seed=seed)
+        print("{}: matches SearchableAPQ".format(name))
+
+
+if __name__ == "__main__":
+    main()
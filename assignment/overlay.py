@@ -0,0 +1,297 @@
+"""Copy-on-write overlays of a Graph for what-if queries."""
+
+from sys import getsizeof
+from graph import Edge, Graph, Vertex
+
+
+class _OverlayAdjacency:
+    """Read-only adjacency map of an overlay, merged with its base on lookup.
+
+    Stands in for Graph._adj_map, so the read-only Graph methods and
+    shortest_paths work on an overlay unchanged.
+    """
+
+    def __init__(self, overlay):
+        """Initialise a new view of the adjacency of overlay."""
+        self._overlay = overlay
+
+    def __contains__(self, v):
+        """Return True if v is a vertex of the overlay, otherwise False."""
+        return self._overlay._has_vertex(v)
+
+    def __getitem__(self, v):
+        """Return the opposite vertices of v mapped to their edges."""
+        return self._overlay._adjacent(v)
+
+    def __iter__(self):
+        """Iterate over the vertices of the overlay."""
+        overlay = self._overlay
+        for vertex in overlay._base._adj_map:
+            if vertex not in overlay._removed_vertices:
+                yield vertex
+        for vertex in overlay._new_vertices:
+            yield vertex
+
+    def __len__(self):
+        """Return the number of vertices in the overlay."""
+        overlay = self._overlay
+        return (len(overlay._base._adj_map) - len(overlay._removed_vertices)
+                + len(overlay._new_vertices))
+
+    def items(self):
+        """Iterate over (vertex, adjacent) pairs, as dict.items() does."""
+        adjacent = self._overlay._adjacent
+        for vertex in self:
+            yield vertex, adjacent(vertex)
+
+
+class _OverlayIds:
+    """Vertices of an overlay by id: the base's ids followed by new ones."""
+
+    def __init__(self, base_ids, offset, new_ids):
+        """Initialise a new view of the ids of an overlay.
+
+        Args:
+            base_ids (list): The vertices of the base graph by id.
+            offset (int): The first id not used by the base graph.
+            new_ids (list): The vertices added to the overlay, by id from
+                            offset.
+        """
+        self._base_ids = base_ids
+        self._offset = offset
+        self._new_ids = new_ids
+
+    def __len__(self):
+        """Return the number of ids in use, removed vertices included."""
+        return self._offset + len(self._new_ids)
+
+    def __getitem__(self, i):
+        """Return the vertex with id i."""
+        if i < self._offset:
+            return self._base_ids[i]
+        return self._new_ids[i - self._offset]
+
+
+class GraphOverlay(Graph):
+    """A view of a graph with its own added, removed and reweighted edges.
+
+    Changes made to the overlay are recorded alongside it and never touch
+    the base graph, so many overlays can share one loaded graph. Vertices
+    and edges the overlay has not changed are read straight from the base.
+    The base graph must not be changed while overlays on it are in use.
+    """
+
+    def __init__(self, base):
+        """Initialise a new overlay with no changes.
+
+        Args:
+            base (Graph): The graph to overlay. Coordinates are available
+                          through the overlay if it is a RouteMap.
+        """
+        # The base holds the storage, so Graph.__init__ is not called
+        self._base = base
+        self._adj_map = _OverlayAdjacency(self)
+        self._new_vertices = {}
+        self._new_ids = []
+        self._new_labels = {}
+        self._removed_vertices = set()
+        self._removed_edges = set()
+        self._added_edges = {}
+        self._touched = set()
+        self._vertex_ids = _OverlayIds(base._vertex_ids,
+                                       len(base._vertex_ids), self._new_ids)
+
+    def __str__(self):
+        """Return a summary of the overlay."""
+        return "|V| = {}; |E| = {}; overlay of {} changed vertices".format(
+            self.num_vertices(), self.num_edges(), len(self._touched))
+
+    def memory_report(self):
+        """Return the approximate memory used by the changes in the overlay.
+
+        The storage shared with the base graph is not counted, as it is
+        reported by the base graph itself.
+
+        Returns:
+            A dictionary mapping component names to sizes in bytes.
+        """
+        adjacency = getsizeof(self._added_edges) + getsizeof(self._touched)
+        for adjacent in self._added_edges.values():
+            adjacency += getsizeof(adjacent)
+        vertices = getsizeof(self._new_vertices) + getsizeof(self._new_ids)
+        for vertex, coordinates in self._new_vertices.items():
+            vertices += getsizeof(vertex) + getsizeof(coordinates)
+        edge_bytes = 0
+        for v1, adjacent in self._added_edges.items():
+            for edge in adjacent.values():
+                if edge.start() == v1:
+                    edge_bytes += getsizeof(edge) + getsizeof(edge.vertices())
+                    edge_bytes += getsizeof(edge.element())
+        labels = getsizeof(self._new_labels)
+        for label in self._new_labels:
+            labels += getsizeof(label)
+        removed = (getsizeof(self._removed_vertices)
+                   + getsizeof(self._removed_edges))
+        return {"adjacency": adjacency, "vertices": vertices,
+                "edges": edge_bytes, "labels": labels, "removed": removed}
+
+    def _has_vertex(self, v):
+        """Return True if v is a vertex of the overlay, otherwise False."""
+        if v in self._new_vertices:
+            return True
+        return v in self._base._adj_map and v not in self._removed_vertices
+
+    def _adjacent(self, v):
+        """Return the opposite vertices of v mapped to their edges."""
+        if not self._has_vertex(v):
+            raise KeyError(v)
+        if v not in self._touched:
+            return self._base._adj_map[v]
+        adjacent = {}
+        if v not in self._new_vertices:
+            for opposite, edge in self._base._adj_map[v].items():
+                if (opposite not in self._removed_vertices
+                        and edge not in self._removed_edges):
+                    adjacent[opposite] = edge
+        adjacent.update(self._added_edges.get(v, {}))
+        return adjacent
+
+    def get_vertex_by_label(self, element):
+        """Return the first vertex that matches element.
+
+        Args:
+            element (Element): The element to search for.
+        """
+        if element in self._new_labels:
+            return self._new_labels[element]
+        vertex = self._base.get_vertex_by_label(element)
+        if vertex in self._removed_vertices:
+            return None
+        return vertex
+
+    def get_coordinates(self, v):
+        """Return the coordinates of the vertex or None if not available.
+
+        Args:
+            v (Vertex): Vertex to get the coordinates of.
+        """
+        if v in self._new_vertices:
+            return self._new_vertices[v]
+        if v in self._removed_vertices or not hasattr(self._base,
+                                                      "get_coordinates"):
+            return None
+        return self._base.get_coordinates(v)
+
+    def add_vertex(self, element, coordinates=None):
+        """Add and return a new vertex to the overlay.
+
+        Args:
+            element (any): The data associated with the vertex.
+            coordinates (tuple): Pair of geographic coordinates of the vertex.
+                                 (Default: None)
+        """
+        vertex = Vertex(element, len(self._vertex_ids))
+        self._new_ids.append(vertex)
+        self._new_vertices[vertex] = coordinates
+        self._new_labels[element] = vertex
+        self._touched.add(vertex)
+        return vertex
+
+    def add_edge(self, v1, v2, element):
+        """Add and return an edge between vertices v1 and v2.
+
+        Replaces any edge already between them in the overlay.
+
+        Args:
+            v1 (Vertex): The first vertex in the edge.
+            v2 (Vertex): The second vertex in the edge.
+            element (any): The data associated with the edge.
+        """
+        if not self._has_vertex(v1) or not self._has_vertex(v2):
+            return None
+        old_edge = self.get_edge(v1, v2)
+        if old_edge is not None:
+            self.remove_edge(old_edge)
+        new_edge = Edge(v1, v2, element)
+        self._added_edges.setdefault(v1, {})[v2] = new_edge
+        self._added_edges.setdefault(v2, {})[v1] = new_edge
+        self._touched.update((v1, v2))
+        return new_edge
+
+    def reweight_edge(self, e, element):
+        """Replace edge e with one between the same vertices.
+
+        Args:
+            e (Edge): The edge to reweight.
+            element (any): The new data associated with the edge.
+
+        Returns:
+            The new edge.
+        """
+        v1, v2 = e.vertices()
+        self.remove_edge(e)
+        return self.add_edge(v1, v2, element)
+
+    def remove_edge(self, e):
+        """Remove edge e from the overlay.
+
+        Args:
+            e (Edge): Edge to be removed.
+        """
+        v1, v2 = e.vertices()
+        if self._added_edges.get(v1, {}).get(v2) is e:
+            del self._added_edges[v1][v2]
+            del self._added_edges[v2][v1]
+        else:
+            self._removed_edges.add(e)
+        self._touched.update((v1, v2))
+
+    def remove_vertex(self, v):
+        """Remove vertex v and all incident edges on it from the overlay.
+
+        Args:
+            v (Vertex): Vertex to be removed.
+        """
+        if not self._has_vertex(v):
+            return
+        opposites = list(self._adjacent(v))
+        for opposite in self._added_edges.pop(v, {}):
+            del self._added_edges[opposite][v]
+        if v in self._new_vertices:
+            del self._new_vertices[v]
+            del self._new_labels[v.element()]
+        else:
+            self._removed_vertices.add(v)
+        self._touched.update(opposites)
+
+    def component(self, v):
+        """Return the lowest id vertex in the component containing v.
+
+        Args:
+            v (Vertex): The vertex to find the component of.
+        """
+        if not self._has_vertex(v):
+            return None
+        return min(self.shortest_paths(v), key=lambda w: w.index())
+
+    def connected(self, v, w):
+        """Return True if there is a path between v and w, otherwise False.
+
+        Args:
+            v (Vertex): The first vertex.
+            w (Vertex): The second vertex.
+        """
+        return self._has_vertex(v) and w in self.shortest_paths(v)
+
+    def sp(self, v, w):
+        """Get the shortest path from vertex v to w.
+
+        Args:
+            v (Vertex): Start vertex in the path.
+            w (Vertex): End vertex in the path.
+
+        Returns:
+            A list of the vertices on the path from v to w with their costs,
+            or an empty list if w cannot be reached from v.
+        """
+        return self.shortest_paths(v).path_to(w)
@@ -0,0 +1,216 @@
+"""Pairing Heap with the Adaptable Priority Queue interface."""
+
+
+class PairingNode:
+    """A node of a pairing heap, which is also the reference to its item."""
+
+    __slots__ = ("_key", "_value", "_child", "_next", "_prev")
+
+    def __init__(self, key, value):
+        """Initialise a new node.
+
+        Args:
+            key (any): The key associated with the data.
+            value (any): The data of the node.
+        """
+        self._key = key
+        self._value = value
+        self._child = None
+        self._next = None
+        # The parent for a leftmost child, otherwise the previous sibling
+        self._prev = None
+
+    def _wipe(self):
+        """Clear all of the data in the node."""
+        self._key = None
+        self._value = None
+        self._child = None
+        self._next = None
+        self._prev = None
+
+
+class PairingHeap:
+    """Adaptable Priority Queue stored as a pairing heap.
+
+    Adding an item and decreasing its key take constant time, with the
+    restructuring deferred to remove_min, which takes amortized O(log n).
+    """
+
+    def __init__(self):
+        """Initialise a new queue."""
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        """Return the length of the queue."""
+        return self._size
+
+    def add(self, key, value):
+        """Add an item to the queue with the specified priority.
+
+        Returns:
+            A reference to the item within the queue.
+        """
+        node = PairingNode(key, value)
+        self._root = self._meld(self._root, node)
+        self._size += 1
+        return node
+
+    def get_min(self):
+        """Return the highest priority item in the queue."""
+        if self._root is not None:
+            return (self._root._key, self._root._value)
+
+    def remove_min(self):
+        """Remove and return the highest priority item in the queue.
+
+        Returns:
+            The (key, value) pair of the highest priority item.
+        """
+        if self._root is not None:
+            return self.remove(self._root)
+
+    def remove(self, element):
+        """Remove and return the given element from the queue.
+
+        Args:
+            element (PairingNode): An element already in the queue.
+
+        Returns:
+            The (key, value) pair from the element.
+        """
+        if element._key is None and element._value is None:
+            return None
+        self._detach(element)
+        self._size -= 1
+        key, value = element._key, element._value
+        element._wipe()
+        return (key, value)
+
+    def get_key(self, element):
+        """Return the current key for element.
+
+        Args:
+            element (PairingNode): An element already in the queue.
+        """
+        return element._key
+
+    def update_key(self, element, newkey):
+        """Update the key of the element.
+
+        Args:
+            element (PairingNode): The element to update key
+        """
+        if element._key is None and element._value is None:
+            return
+        if newkey < element._key:
+            element._key = newkey
+            if element is not self._root:
+                self._cut(element)
+                self._root = self._meld(self._root, element)
+        else:
+            self._detach(element)
+            element._key = newkey
+            self._root = self._meld(self._root, element)
+
+    def _detach(self, node):
+        """Take node out of the heap, keeping its children in the heap."""
+        if node is self._root:
+            self._root = self._combine(node)
+        else:
+            self._cut(node)
+            self._root = self._meld(self._root, self._combine(node))
+
+    def _cut(self, node):
+        """Cut the subtree rooted at node from its parent."""
+        prev = node._prev
+        if prev._child is node:
+            prev._child = node._next
+        else:
+            prev._next = node._next
+        if node._next is not None:
+            node._next._prev = prev
+        node._next = None
+        node._prev = None
+
+    def _meld(self, a, b):
+        """Join two heaps, returning the root of the result."""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b._key < a._key:
+            a, b = b, a
+        b._next = a._child
+        if a._child is not None:
+            a._child._prev = b
+        b._prev = a
+        a._child = b
+        return a
+
+    def _combine(self, node):
+        """Meld the children of node into one heap with two-pass pairing."""
+        trees = []
+        child = node._child
+        node._child = None
+        while child is not None:
+            following = child._next
+            child._next = None
+            child._prev = None
+            trees.append(child)
+            child = following
+        if not trees:
+            return None
+        # First pass: meld pairs from left to right
+        paired = [self._meld(trees[i], trees[i + 1])
+                  if i + 1 < len(trees) else trees[i]
+                  for i in range(0, len(trees), 2)]
+        # Second pass: meld the results from right to left
+        result = paired[-1]
+        for i in range(len(paired) - 2, -1, -1):
+            result = self._meld(paired[i], result)
+        return result
+
+
+class SearchablePairingHeap(PairingHeap):
+    """Searchable Pairing Heap.
+
+    Has lookup function for getting references to items within the queue.
+    """
+
+    def __init__(self):
+        """Initialise a new queue."""
+        super().__init__()
+        self._lookup = {}
+
+    def __contains__(self, item):
+        """Return True if item is in the queue, otherwise False."""
+        return item in self._lookup
+
+    def __getitem__(self, item):
+        """Get the reference to the item in the queue."""
+        return self._lookup.get(item)
+
+    def add(self, key, value):
+        """Add an item to the queue with the specified priority.
+
+        Returns:
+            A reference to the item within the queue.
+        """
+        node = super().add(key, value)
+        self._lookup[value] = node
+        return node
+
+    def remove(self, element):
+        """Remove and return the given element from the queue.
+
+        Args:
+            element (PairingNode): An element already in the queue.
+
+        Returns:
+            The (key, value) pair from the element.
+        """
+        removed = super().remove(element)
+        if removed is not None:
+            del self._lookup[removed[1]]
+        return removed
@@ -0,0 +1,483 @@
+"""Partitioning of Route Maps into independently loadable regions.
+
+A partitioned route map is stored as a directory with:
+
+- region_<i>.txt: the vertices of region i and the edges between them,
+  in the same format as read_route_graph reads.
+- region_<i>.boundary: labels of the vertices in region i with an edge
+  to another region, one per line.
+- index.txt: "label region" lines mapping every vertex to its region.
+- cut.txt: the edges between regions and their end vertices.
+- overlay.txt: the boundary vertices, the cut edges and a shortcut edge
+  between every pair of boundary vertices in a region, weighted by the
+  shortest distance between them inside the region.
+
+Each region only needs its own files, so regions can be searched in
+separate processes or on separate hosts while the overlay joins them.
+RegionWorkers pins every region to one worker process, so the workers
+hold the route map between them once.
+"""
+
+import os
+from multiprocessing import Pool
+from random import Random
+from apq import SearchableAPQ
+from routemap import RouteMap
+
+
+_region_cache = {}
+
+
+def partition(routemap, regions):
+    """Split the vertices of a route map into balanced regions.
+
+    Uses recursive coordinate bisection: the vertices are split at the
+    median of whichever coordinate has the larger spread, which on road
+    maps gives regions of equal size with few edges between them.
+
+    Args:
+        routemap (RouteMap): The route map to split.
+        regions (int): The number of regions to split into.
+
+    Returns:
+        A dictionary mapping each vertex to its region number.
+    """
+    assignment = {}
+    _bisect(routemap, routemap.vertices(), regions, 0, assignment)
+    return assignment
+
+
+def _bisect(routemap, vertices, regions, first, assignment):
+    """Assign vertices to regions first to first + regions - 1."""
+    if regions == 1 or len(vertices) < 2:
+        for vertex in vertices:
+            assignment[vertex] = first
+        return
+    coords = [routemap.get_coordinates(vertex) for vertex in vertices]
+    lats = [c[0] for c in coords]
+    lons = [c[1] for c in coords]
+    axis = 0 if max(lats) - min(lats) >= max(lons) - min(lons) else 1
+    order = sorted(range(len(vertices)), key=lambda i: coords[i][axis])
+    left_regions = regions // 2
+    split = len(vertices) * left_regions // regions
+    left = [vertices[i] for i in order[:split]]
+    right = [vertices[i] for i in order[split:]]
+    _bisect(routemap, left, left_regions, first, assignment)
+    _bisect(routemap, right, regions - left_regions, first + left_regions,
+            assignment)
+
+
+def cut_edges(routemap, assignment):
+    """Return the edges whose end vertices are in different regions.
+
+    Args:
+        routemap (RouteMap): The partitioned route map.
+        assignment (dict): Vertices mapped to their region numbers.
+    """
+    return [edge for edge in routemap.edges()
+            if assignment[edge.start()] != assignment[edge.end()]]
+
+
+def save_partitions(routemap, assignment, directory):
+    """Write each region of a partitioned route map to its own files.
+
+    Args:
+        routemap (RouteMap): The partitioned route map.
+        assignment (dict): Vertices mapped to their region numbers.
+        directory (str): The directory to write the files into.
+    """
+    os.makedirs(directory, exist_ok=True)
+    members = {}
+    for vertex, region in assignment.items():
+        members.setdefault(region, []).append(vertex)
+    cut = cut_edges(routemap, assignment)
+    boundary = set()
+    for edge in cut:
+        boundary.update(edge.vertices())
+
+    for region, vertices in members.items():
+        routemap.write_route_graph(_region_file(directory, region), vertices)
+        with open(_boundary_file(directory, region), "w") as file:
+            for vertex in vertices:
+                if vertex in boundary:
+                    file.write("{}\n".format(vertex.element()))
+    with open(os.path.join(directory, "index.txt"), "w") as file:
+        for vertex, region in assignment.items():
+            file.write("{} {}\n".format(vertex.element(), region))
+
+    cut_map = RouteMap()
+    for vertex in boundary:
+        cut_map.add_vertex(vertex.element(), routemap.get_coordinates(vertex))
+    for edge in cut:
+        v1 = cut_map.get_vertex_by_label(edge.start().element())
+        v2 = cut_map.get_vertex_by_label(edge.end().element())
+        cut_map.add_edge(v1, v2, edge.element())
+    cut_map.write_route_graph(os.path.join(directory, "cut.txt"))
+
+
+def _region_file(directory, region):
+    return os.path.join(directory, "region_{}.txt".format(region))
+
+
+def _boundary_file(directory, region):
+    return os.path.join(directory, "region_{}.boundary".format(region))
+
+
+def load_region(directory, region):
+    """Load a single region, caching it for the rest of the process.
+
+    Workers of a RegionWorkers only ever load the regions they own, so the
+    cache of each holds its share of the map and no more.
+
+    Args:
+        directory (str): The directory the partitions were saved to.
+        region (int): The region number.
+
+    Returns:
+        A (routemap, boundary) pair, where boundary is a list of the
+        region's boundary vertices.
+    """
+    key = (directory, region)
+    if key not in _region_cache:
+        routemap = RouteMap(_region_file(directory, region))
+        with open(_boundary_file(directory, region), "r") as file:
+            labels = [int(line) for line in file if line.strip()]
+        boundary = [routemap.get_vertex_by_label(label) for label in labels]
+        _region_cache[key] = (routemap, boundary)
+    return _region_cache[key]
+
+
+def region_shortcuts(directory, region):
+    """Return the distances between the boundary vertices of a region.
+
+    Only paths inside the region are considered.
+
+    Args:
+        directory (str): The directory the partitions were saved to.
+        region (int): The region number.
+
+    Returns:
+        A list of (label, label, cost) triples, one per connected pair.
+    """
+    routemap, boundary = load_region(directory, region)
+    shortcuts = []
+    for i, v in enumerate(boundary):
+        paths = routemap.shortest_paths(v)
+        for w in boundary[i + 1:]:
+            if w in paths:
+                shortcuts.append((v.element(), w.element(), paths.cost(w)))
+    return shortcuts
+
+
+def local_search(directory, region, label, target=None):
+    """Search from a vertex to the boundary of its region.
+
+    Args:
+        directory (str): The directory the partitions were saved to.
+        region (int): The region the vertex is in.
+        label (int): The label of the vertex to search from.
+        target (int): Label of a vertex in the same region to also find the
+                      cost to. (Default: None)
+
+    Returns:
+        A (boundary_costs, target_cost) pair, where boundary_costs maps the
+        labels of the reachable boundary vertices to their costs, and
+        target_cost is None if target is not given or not reachable.
+    """
+    routemap, boundary = load_region(directory, region)
+    paths = routemap.shortest_paths(routemap.get_vertex_by_label(label))
+    boundary_costs = {}
+    for vertex in boundary:
+        if vertex in paths:
+            boundary_costs[vertex.element()] = paths.cost(vertex)
+    target_cost = None
+    if target is not None:
+        target_cost = paths.cost(routemap.get_vertex_by_label(target))
+    return (boundary_costs, target_cost)
+
+
+def region_path(directory, region, source, target):
+    """Return the shortest path between two vertices inside a region.
+
+    Args:
+        directory (str): The directory the partitions were saved to.
+        region (int): The region both vertices are in.
+        source (int): Label of the start vertex.
+        target (int): Label of the end vertex.
+
+    Returns:
+        A list of (label, cost) pairs from source to target, or an empty
+        list if target cannot be reached inside the region.
+    """
+    routemap, _ = load_region(directory, region)
+    v = routemap.get_vertex_by_label(source)
+    w = routemap.get_vertex_by_label(target)
+    path = routemap.shortest_paths(v, target=w).path_to(w)
+    return [(vertex.element(), cost) for vertex, cost in path]
+
+
+def _join(path, segment):
+    """Extend path with segment, a path from the last vertex of path."""
+    offset = path[-1][1]
+    path.extend((label, offset + cost) for label, cost in segment[1:])
+
+
+class RegionWorkers:
+    """Worker processes that each own a fixed share of the regions.
+
+    Region r is only ever searched by worker r % processes, so each region
+    is loaded into a single process. A plain Pool sends any task to any
+    worker, so in time every worker would load every region.
+    """
+
+    def __init__(self, processes):
+        """Start the workers.
+
+        Args:
+            processes (int): Number of worker processes.
+        """
+        self._pools = [Pool(1) for _ in range(processes)]
+
+    def __enter__(self):
+        """Return the workers for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the workers at the end of a with statement."""
+        self.terminate()
+
+    def starmap(self, function, tasks):
+        """Call function with each task on the worker owning its region.
+
+        Args:
+            function (callable): A function whose first two arguments are
+                                 the partition directory and a region.
+            tasks (list): Tuples of the arguments for each call.
+
+        Returns:
+            A list of the results, in the order of the tasks.
+        """
+        pools = self._pools
+        pending = [pools[task[1] % len(pools)].apply_async(function, task)
+                   for task in tasks]
+        return [result.get() for result in pending]
+
+    def close(self):
+        """Let the workers finish their tasks and wait for them to exit."""
+        for pool in self._pools:
+            pool.close()
+        for pool in self._pools:
+            pool.join()
+
+    def terminate(self):
+        """Stop the workers straight away."""
+        for pool in self._pools:
+            pool.terminate()
+
+
+def build_overlay(directory, pool=None):
+    """Compute the region shortcuts and write the overlay graph.
+
+    Args:
+        directory (str): The directory the partitions were saved to.
+        pool (RegionWorkers): Workers to compute the regions on in
+                              parallel. (Default: None)
+    """
+    regions = set()
+    with open(os.path.join(directory, "index.txt"), "r") as file:
+        for line in file:
+            regions.add(int(line.split()[1]))
+    tasks = [(directory, region) for region in sorted(regions)]
+    if pool is not None:
+        results = pool.starmap(region_shortcuts, tasks)
+    else:
+        results = [region_shortcuts(*task) for task in tasks]
+
+    overlay = RouteMap(os.path.join(directory, "cut.txt"))
+    for shortcuts in results:
+        for label1, label2, cost in shortcuts:
+            v1 = overlay.get_vertex_by_label(label1)
+            v2 = overlay.get_vertex_by_label(label2)
+            edge = overlay.get_edge(v1, v2)
+            if edge is None or cost < edge.element():
+                overlay.add_edge(v1, v2, cost)
+    overlay.write_route_graph(os.path.join(directory, "overlay.txt"))
+
+
+class PartitionedRouter:
+    """Answer shortest path queries over a partitioned route map.
+
+    The router only holds the overlay; searches inside regions are done by
+    local_search and region_path, in this process or on RegionWorkers.
+    Paths are given by vertex label, as the vertices themselves live in
+    the processes of their regions.
+    """
+
+    def __init__(self, directory, pool=None):
+        """Initialise a new router.
+
+        Args:
+            directory (str): The directory the partitions were saved to.
+            pool (RegionWorkers): Workers to run the region searches on.
+                                  (Default: None)
+        """
+        self._directory = directory
+        self._pool = pool
+        self._region_of = {}
+        with open(os.path.join(directory, "index.txt"), "r") as file:
+            for line in file:
+                label, region = line.split()
+                self._region_of[int(label)] = int(region)
+        self._overlay = RouteMap(os.path.join(directory, "overlay.txt"))
+
+    def region_of(self, label):
+        """Return the region of the vertex with label, or None if unknown."""
+        return self._region_of.get(label)
+
+    def _run(self, function, tasks):
+        """Run the region tasks on the workers, or here without them."""
+        if self._pool is not None:
+            return self._pool.starmap(function, tasks)
+        return [function(*task) for task in tasks]
+
+    def _search(self, source, target):
+        """Return the cost between two vertices and the overlay route.
+
+        The route is a list of the labels of the boundary vertices the
+        shortest path passes through, or None if it stays in one region.
+        """
+        source_region = self._region_of[source]
+        target_region = self._region_of[target]
+        same_region = source_region == target_region
+        tasks = [(self._directory, source_region, source,
+                  target if same_region else None),
+                 (self._directory, target_region, target)]
+        (exits, best), (entries, _) = self._run(local_search, tasks)
+        return self._overlay_route(exits, entries, best)
+
+    def cost(self, source, target):
+        """Return the cost of the shortest path between two vertices.
+
+        Args:
+            source (int): Label of the start vertex.
+            target (int): Label of the end vertex.
+
+        Returns:
+            The cost of the path, or None if there is no path.
+        """
+        return self._search(source, target)[0]
+
+    def path(self, source, target):
+        """Return the shortest path between two vertices.
+
+        Args:
+            source (int): Label of the start vertex.
+            target (int): Label of the end vertex.
+
+        Returns:
+            A list of (label, cost) pairs from source to target, or an empty
+            list if there is no path.
+        """
+        best, route = self._search(source, target)
+        if best is None:
+            return []
+        region_of = self._region_of
+        directory = self._directory
+        if route is None:
+            return region_path(directory, region_of[source], source, target)
+        # The route alternates shortcuts inside a region with cut edges
+        # between regions, and only the shortcuts need a region search
+        tasks = [(directory, region_of[source], source, route[0])]
+        for label1, label2 in zip(route, route[1:]):
+            if region_of[label1] == region_of[label2]:
+                tasks.append((directory, region_of[label1], label1, label2))
+        tasks.append((directory, region_of[target], route[-1], target))
+        segments = iter(self._run(region_path, tasks))
+        path = next(segments)
+        overlay = self._overlay
+        for label1, label2 in zip(route, route[1:]):
+            if region_of[label1] == region_of[label2]:
+                _join(path, next(segments))
+            else:
+                edge = overlay.get_edge(overlay.get_vertex_by_label(label1),
+                                        overlay.get_vertex_by_label(label2))
+                path.append((label2, path[-1][1] + edge.element()))
+        _join(path, next(segments))
+        return path
+
+    def _overlay_route(self, exits, entries, best):
+        """Join the costs out of one region to the costs into another.
+
+        Returns:
+            A (cost, route) pair, where route lists the labels of the
+            overlay vertices on the best path, or is None if best, the cost
+            inside the region, is not improved on.
+        """
+        overlay = self._overlay
+        opened = SearchableAPQ()
+        previous = {}
+        for label, cost in exits.items():
+            vertex = overlay.get_vertex_by_label(label)
+            opened.add(cost, vertex)
+            previous[vertex] = None
+        targets = {overlay.get_vertex_by_label(label): cost
+                   for label, cost in entries.items()}
+        closed = set()
+        last = None
+        while len(opened) > 0:
+            cost, vertex = opened.remove_min()
+            if best is not None and cost >= best:
+                break
+            closed.add(vertex)
+            if vertex in targets:
+                total = cost + targets[vertex]
+                if best is None or total < best:
+                    best = total
+                    last = vertex
+            for edge in overlay.get_edges(vertex):
+                opposite = edge.opposite(vertex)
+                if opposite in closed:
+                    continue
+                new_cost = cost + edge.element()
+                element = opened[opposite]
+                if element is None:
+                    opened.add(new_cost, opposite)
+                    previous[opposite] = vertex
+                elif new_cost < opened.get_key(element):
+                    opened.update_key(element, new_cost)
+                    previous[opposite] = vertex
+        if last is None:
+            return (best, None)
+        route = []
+        while last is not None:
+            route.append(last.element())
+            last = previous[last]
+        route.reverse()
+        return (best, route)
+
+
+def main():
+    routemap = RouteMap("corkCityData.txt")
+    directory = "corkCityPartitions"
+    assignment = partition(routemap, 8)
+    print("Cut edges: {}".format(len(cut_edges(routemap, assignment))))
+    save_partitions(routemap, assignment, directory)
+
+    with RegionWorkers(4) as pool:
+        build_overlay(directory, pool)
+        router = PartitionedRouter(directory, pool)
+        rng = Random(0)
+        vertices = routemap.vertices()
+        for _ in range(10):
+            v = vertices[rng.randrange(len(vertices))]
+            w = vertices[rng.randrange(len(vertices))]
+            path = routemap.sp(v, w)
+            expected = path[-1][1] if path else None
+            route = router.path(v.element(), w.element())
+            cost = route[-1][1] if route else None
+            print("{} -> {}: {} in {} steps (single graph: {})".format(
+                v, w, cost, len(route), expected))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Bulk export of Route Map paths."""
+
+import csv
+import json
+from array import array
+from struct import Struct
+
+
+_BINARY_MAGIC = b"RMPATHS1"
+_PATH_HEADER = Struct("<qI")
+
+
+class PathExporter:
+    """Stream many paths from a route map into a single output file.
+
+    Paths are the lists of (vertex, cost) pairs returned by RouteMap.sp.
+    Supported formats are "csv", "geojson" and "binary".
+    """
+
+    FORMATS = ("csv", "geojson", "binary")
+
+    def __init__(self, routemap, filename, fmt="csv", buffer_size=1 << 20):
+        """Open a new exporter.
+
+        Args:
+            routemap (RouteMap): The route map the paths were found on.
+            filename (str): Path to the output file.
+            fmt (str): One of "csv", "geojson" or "binary". (Default: "csv")
+            buffer_size (int): Size in bytes of the write buffer.
+                               (Default: 1 MiB)
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError("Unknown export format: {}".format(fmt))
+        self._routemap = routemap
+        self._fmt = fmt
+        self._count = 0
+        if fmt == "binary":
+            self._file = open(filename, "wb", buffering=buffer_size)
+            self._file.write(_BINARY_MAGIC)
+        else:
+            self._file = open(filename, "w", buffering=buffer_size,
+                              newline="")
+        if fmt == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(("path", "element", "latitude",
+                                   "longitude", "cost"))
+        elif fmt == "geojson":
+            self._file.write('{"type": "FeatureCollection", "features": [\n')
+
+    def __enter__(self):
+        """Return the exporter for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the exporter when leaving the context."""
+        self.close()
+
+    def __len__(self):
+        """Return the number of paths written so far."""
+        return self._count
+
+    def _columns(self, path):
+        """Split a path into element, latitude, longitude and cost columns."""
+        get_coordinates = self._routemap.get_coordinates
+        vertices = [step[0] for step in path]
+        coords = [get_coordinates(vertex) for vertex in vertices]
+        elements = [vertex.element() for vertex in vertices]
+        lats = [c[0] for c in coords]
+        lons = [c[1] for c in coords]
+        costs = [step[1] for step in path]
+        return elements, lats, lons, costs
+
+    def write_path(self, path, path_id=None):
+        """Write a single path to the output.
+
+        Args:
+            path (list): A list of (vertex, cost) pairs on a path.
+            path_id (int): Identifier for the path. (Default: the number of
+                           paths already written)
+        """
+        if path_id is None:
+            path_id = self._count
+        elements, lats, lons, costs = self._columns(path)
+        if self._fmt == "csv":
+            self._writer.writerows(
+                zip([path_id] * len(path), elements, lats, lons, costs))
+        elif self._fmt == "geojson":
+            feature = {
+                "type": "Feature",
+                "geometry": {"type": "LineString",
+                             "coordinates": list(zip(lons, lats))},
+                "properties": {"path": path_id, "elements": elements,
+                               "costs": costs},
+            }
+            if self._count > 0:
+                self._file.write(",\n")
+            self._file.write(json.dumps(feature))
+        else:
+            self._file.write(_PATH_HEADER.pack(path_id, len(path)))
+            self._file.write(array("q", elements).tobytes())
+            self._file.write(array("d", lats).tobytes())
+            self._file.write(array("d", lons).tobytes())
+            self._file.write(array("d", costs).tobytes())
+        self._count += 1
+
+    def write_paths(self, paths):
+        """Write every path from an iterable of paths to the output.
+
+        Args:
+            paths (iterable): Paths, each a list of (vertex, cost) pairs.
+        """
+        for path in paths:
+            self.write_path(path)
+
+    def close(self):
+        """Finish the output and close the file."""
+        if self._file.closed:
+            return
+        if self._fmt == "geojson":
+            self._file.write("\n]}\n")
+        self._file.close()
+
+
+def read_binary_paths(filename):
+    """Yield the paths stored in a binary export file.
+
+    Args:
+        filename (str): Path to a file written by PathExporter.
+
+    Returns:
+        A generator of (path_id, steps) pairs, where each step is an
+        (element, latitude, longitude, cost) tuple.
+    """
+    with open(filename, "rb") as file:
+        if file.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+            raise ValueError("{} is not a binary path file".format(filename))
+        header = file.read(_PATH_HEADER.size)
+        while header:
+            path_id, length = _PATH_HEADER.unpack(header)
+            columns = []
+            for typecode in ("q", "d", "d", "d"):
+                column = array(typecode)
+                column.frombytes(file.read(length * column.itemsize))
+                columns.append(column)
+            yield (path_id, list(zip(*columns)))
+            header = file.read(_PATH_HEADER.size)
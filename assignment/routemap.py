@@ -2,7 +2,10 @@
 
 from time import time
 from math import sqrt
+from array import array
+from sys import getsizeof
 from graph import Graph
+from pathexport import PathExporter
 
 
 class RouteMap(Graph):
@@ -16,7 +19,8 @@ class RouteMap(Graph):
                             (Default: None)
         """
         super().__init__()
-        self._coords = {}
+        # Latitude and longitude of the vertex with id i are at 2i and 2i + 1
+        self._coords = array("d")
         if filename:
             self.read_route_graph(filename)
 
@@ -34,30 +38,30 @@ class RouteMap(Graph):
             coordinates (tuple): Pair of geographic coordinates of the vertex.
         """
         vertex = super().add_vertex(element)
-        self._coords[vertex] = coordinates
+        self._coords.append(coordinates[0])
+        self._coords.append(coordinates[1])
         return vertex
 
-    def remove_vertex(self, v):
-        """Remove vertex v and all incident edges on it.
-
-        Args:
-            v (Vertex): Vertex to be removed.
-        """
-        super().remove_vertex(v)
-        if v in self._coords:
-            del self._coords[v]
-
     def get_coordinates(self, v):
         """Return the coordinates of the vertex or None if not in the graph.
 
         Args:
             v (Vertex): Vertex to get the coordinates of.
         """
-        try:
-            coordinates = self._coords[v]
-        except KeyError:
-            coordinates = None
-        return coordinates
+        i = self._vertex_id(v)
+        if i is None:
+            return None
+        return (self._coords[2 * i], self._coords[2 * i + 1])
+
+    def memory_report(self):
+        """Return the approximate memory used by each part of the route map.
+
+        Returns:
+            A dictionary mapping component names to sizes in bytes.
+        """
+        report = super().memory_report()
+        report["coordinates"] = getsizeof(self._coords)
+        return report
 
     def distance(self, c1, c2):
         """Return the distance between coordinates c1 and c2.
@@ -79,14 +83,41 @@ class RouteMap(Graph):
         """
         min_distance = None
         closest_vertex = None
-        for vertex in self._coords:
-            coords_to_compare = self._coords[vertex]
+        for vertex in self._adj_map:
+            coords_to_compare = self.get_coordinates(vertex)
             distance = self.distance(coordinates, coords_to_compare)
             if not min_distance or distance < min_distance:
                 min_distance = distance
                 closest_vertex = vertex
         return closest_vertex
 
+    def get_vertices_by_coordinates(self, points):
+        """Return the closest vertex to each of many sets of coordinates.
+
+        For repeated batches on an unchanged route map, create a
+        snapping.CoordinateSnapper once and reuse it instead.
+
+        Args:
+            points (array-like): Sequence of coordinate pairs.
+        """
+        from snapping import CoordinateSnapper
+        return CoordinateSnapper(self).nearest_vertices(points)[0]
+
+    def snap_to_edges(self, points):
+        """Return the closest edge to each point and the projection onto it.
+
+        Args:
+            points (array-like): Sequence of coordinate pairs.
+
+        Returns:
+            A list of (edge, offset, distance) triples, where offset is the
+            fraction of the way along the edge from its start vertex.
+        """
+        from snapping import CoordinateSnapper
+        edges, offsets, distances = CoordinateSnapper(self).nearest_edges(
+            points)
+        return list(zip(edges, offsets.tolist(), distances.tolist()))
+
     def sp(self, v, w):
         """Get the shortest path from vertex v to w.
 
@@ -95,19 +126,12 @@ class RouteMap(Graph):
             w (Vertex): End vertex in the path.
 
         Returns:
-            A list of the vertices on the path from v to w with their costs.
+            A list of the vertices on the path from v to w with their costs,
+            or an empty list if w cannot be reached from v.
         """
-        shortest_paths = self.shortest_paths(v)
-        path = []
-        target = w
-
-        while target is not None:
-            data = shortest_paths[target]
-            cost, predecessor = data[0], data[1]
-            path.append((target, cost))
-            target = predecessor
-        path.reverse()
-        return path
+        if not self.connected(v, w):
+            return []
+        return self.shortest_paths(v).path_to(w)
 
     def print_path(self, path):
         """Print the path with the coordinates and cost of each step.
@@ -118,7 +142,7 @@ class RouteMap(Graph):
         print("type\tlatitude\tlongitude\telement\tcost")
         for step in path:
             vertex, cost = step[0], step[1]
-            coordinates = self._coords[vertex]
+            coordinates = self.get_coordinates(vertex)
             lat = coordinates[0]
             lon = coordinates[1]
             elt = vertex.element()
@@ -136,12 +160,53 @@ class RouteMap(Graph):
             file.write("type\tlatitude\tlongitude\telement\tcost\n")
             for step in path:
                 vertex, cost = step[0], step[1]
-                coordinates = self._coords[vertex]
+                coordinates = self.get_coordinates(vertex)
                 lat = coordinates[0]
                 lon = coordinates[1]
                 elt = vertex.element()
                 file.write("W\t{}\t{}\t{}\t{}\n".format(lat, lon, elt, cost))
 
+    def export_paths(self, paths, filename, fmt="csv"):
+        """Write many paths to a single file in one pass.
+
+        Args:
+            paths (iterable): Paths, each a list of (vertex, cost) pairs.
+            filename (str): Name of the output file.
+            fmt (str): One of "csv", "geojson" or "binary". (Default: "csv")
+
+        Returns:
+            The number of paths written.
+        """
+        with PathExporter(self, filename, fmt) as exporter:
+            exporter.write_paths(paths)
+        return len(exporter)
+
+    def write_route_graph(self, filename, vertices=None):
+        """Write the route map to a file in the format read_route_graph reads.
+
+        Edge lengths are not kept in the route map, so they are written as 0.
+
+        Args:
+            filename (str): The path to the output file.
+            vertices (iterable): Only write these vertices and the edges
+                                 between them. (Default: all vertices)
+        """
+        if vertices is None:
+            vertices = self.vertices()
+        vertices = set(vertices)
+        with open(filename, "w") as file:
+            for vertex in vertices:
+                lat, lon = self.get_coordinates(vertex)
+                file.write("Node\nid: {}\ngps: {} {}\n".format(
+                    vertex.element(), lat, lon))
+            for edge in self.edges():
+                v1, v2 = edge.vertices()
+                if v1 in vertices and v2 in vertices:
+                    file.write("Edge\nfrom: {}\nto: {}\nlength: 0\n"
+                               "time: {}\noneway: N\n".format(
+                                   v1.element(), v2.element(),
+                                   edge.element()))
+
     def read_route_graph(self, filename):
         """Build a route map from the given file.
 
@@ -149,22 +214,39 @@ class RouteMap(Graph):
             filename (str): The path to the graph file.
         """
         start = time()
+        vertex_count, edge_count = self._read_route_entries(filename)
+        print("Read {} vertices, added {} into graph".format(
+            vertex_count, self.num_vertices()))
+        print("Read {} edges, added {} into graph".format(
+            edge_count, self.num_edges()))
+        end = time()
+        total_time = round((end - start), 4)
+        print("Time to build graph {}s".format(total_time))
+        print("-" * 25, "\n")
+
+    def _read_route_entries(self, filename):
+        """Add the vertices and edges in a route file without printing.
+
+        Args:
+            filename (str): The path to the graph file.
+
+        Returns:
+            The number of vertices and the number of edges read.
+        """
         with open(filename, "r") as file:
             entry = file.readline()
-            count = 0
+            vertex_count = 0
             while entry == "Node\n":
-                count += 1
+                vertex_count += 1
                 nodeid = int(file.readline().split()[1])
                 gps = file.readline().split()
                 latitude = round(float(gps[1]), 6)
                 longitude = round(float(gps[2]), 6)
                 self.add_vertex(nodeid, (latitude, longitude))
                 entry = file.readline()
-            verts = self.num_vertices()
-            print("Read {} vertices, added {} into graph".format(count, verts))
-            count = 0
+            edge_count = 0
             while entry == "Edge\n":
-                count += 1
+                edge_count += 1
                 source = int(file.readline().split()[1])
                 sv = self.get_vertex_by_label(source)
                 target = int(file.readline().split()[1])
@@ -174,13 +256,7 @@ class RouteMap(Graph):
                 file.readline()  # Oneway
                 entry = file.readline()
                 self.add_edge(sv, tv, edge_time)
-            edges = self.num_edges()
-            print("Read {} edges, added {} into graph".format(count, edges))
-        end = time()
-        total_time = round((end - start), 4)
-        print("Time to build graph {}s".format(total_time))
-        print("-" * 25, "\n")
-
+        return (vertex_count, edge_count)
 
 def main():
     routemap = RouteMap("corkCityData.txt")
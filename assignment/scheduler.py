@@ -0,0 +1,296 @@
+"""Thread-safe job scheduler built on the Adaptable Priority Queue."""
+
+from threading import Condition, Thread
+from time import monotonic, perf_counter
+from apq import AdaptablePQ
+
+
+class Job:
+    """A job submitted to a JobScheduler, and the reference to it."""
+
+    WAITING = "waiting"
+    TAKEN = "taken"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+    def __init__(self, payload, priority, deadline, submitted, sequence):
+        """Initialise a new job.
+
+        Args:
+            payload (any): The work to be done.
+            priority (float): Lower values are taken first.
+            deadline (float): Time on the scheduler's clock by which the
+                              job should be taken, or None.
+            submitted (float): Time on the scheduler's clock it was
+                               submitted.
+            sequence (int): Order of submission, to break ties.
+        """
+        self.payload = payload
+        self.priority = priority
+        self.deadline = deadline
+        self.submitted = submitted
+        self.state = Job.WAITING
+        self._sequence = sequence
+        self._element = None
+
+    def __str__(self):
+        """Return a string representation of the job."""
+        return "(Job: {}; priority {}; {})".format(self.payload,
+                                                   self.priority, self.state)
+
+
+class JobScheduler:
+    """Priority and deadline ordered job queue for many worker threads.
+
+    Jobs are taken in order of priority, then deadline, then submission.
+    A job's priority can be bumped or the job cancelled while it waits.
+    Waiting jobs can age: a job's effective priority is lowered by the
+    aging rate for its priority times the time it has waited, so low
+    priority jobs are not starved.
+
+    Aging never needs the waiting jobs to be re-keyed. With rate r, the
+    effective priority p - r * (now - submitted) orders jobs the same as
+    the fixed key p + r * submitted, so jobs that age at the same rate
+    share a queue keyed once on submission. With a rate per priority,
+    each priority has its own queue, and get compares only their heads.
+    """
+
+    def __init__(self, aging=None, drop_expired=False, clock=monotonic):
+        """Initialise a new scheduler.
+
+        Args:
+            aging (float or dict): Priority lost per second of waiting, for
+                                   every job or by priority. (Default: None)
+            drop_expired (bool): Whether to discard jobs that are past their
+                                 deadline instead of handing them out.
+                                 (Default: False)
+            clock (callable): Returns the current time in seconds.
+                              (Default: time.monotonic)
+        """
+        # Queues of waiting jobs, by the priority for per-priority aging
+        # rates, otherwise a single queue under None
+        self._queues = {}
+        self._size = 0
+        self._condition = Condition()
+        self._aging = aging
+        self._drop_expired = drop_expired
+        self._clock = clock
+        self._sequence = 0
+        self._closed = False
+
+    def __len__(self):
+        """Return the number of waiting jobs."""
+        with self._condition:
+            return self._size
+
+    def _rate(self, priority):
+        """Return the aging rate for jobs of the given priority."""
+        if self._aging is None:
+            return 0.0
+        if isinstance(self._aging, dict):
+            return self._aging.get(priority, 0.0)
+        return self._aging
+
+    def _class(self, priority):
+        """Return the key of the queue for jobs of the given priority."""
+        if isinstance(self._aging, dict):
+            return priority
+        return None
+
+    def _key(self, job):
+        """Return the queue key of a job, which does not change as it ages."""
+        aged = job.priority + self._rate(job.priority) * job.submitted
+        deadline = job.deadline if job.deadline is not None else float("inf")
+        return (aged, deadline, job._sequence)
+
+    def _enqueue(self, job):
+        """Add a waiting job to the queue for its priority."""
+        queue_class = self._class(job.priority)
+        queue = self._queues.get(queue_class)
+        if queue is None:
+            queue = self._queues[queue_class] = AdaptablePQ()
+        job._element = queue.add(self._key(job), job)
+        self._size += 1
+
+    def _dequeue(self, job):
+        """Take a waiting job out of the queue for its priority."""
+        queue_class = self._class(job.priority)
+        queue = self._queues[queue_class]
+        queue.remove(job._element)
+        if len(queue) == 0:
+            del self._queues[queue_class]
+        job._element = None
+        self._size -= 1
+
+    def submit(self, payload, priority=0, deadline=None):
+        """Add a job to the scheduler.
+
+        Args:
+            payload (any): The work to be done.
+            priority (float): Lower values are taken first. (Default: 0)
+            deadline (float): Time on the scheduler's clock by which the job
+                              should be taken. (Default: None)
+
+        Returns:
+            The Job, which can be used to bump or cancel it.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit to a closed scheduler")
+            job = Job(payload, priority, deadline, self._clock(),
+                      self._sequence)
+            self._sequence += 1
+            self._enqueue(job)
+            self._condition.notify()
+            return job
+
+    def get(self, timeout=None):
+        """Take the next job, waiting until one is available.
+
+        Args:
+            timeout (float): Most seconds to wait. (Default: wait until a
+                             job is available or the scheduler is closed)
+
+        Returns:
+            The next Job, or None if the timeout passed or the scheduler was
+            closed with no jobs left.
+        """
+        with self._condition:
+            end = None if timeout is None else self._clock() + timeout
+            while True:
+                job = self._take()
+                if job is not None:
+                    return job
+                if self._closed:
+                    return None
+                if end is None:
+                    self._condition.wait()
+                else:
+                    remaining = end - self._clock()
+                    if remaining <= 0:
+                        return None
+                    self._condition.wait(remaining)
+
+    def _next(self, now):
+        """Return the waiting job to hand out next at time now, or None."""
+        best = None
+        best_key = None
+        for queue in self._queues.values():
+            key, job = queue.get_min()
+            # Every job in a queue ages at the same rate, so only the
+            # heads need their effective priority at time now
+            effective = (key[0] - self._rate(job.priority) * now,) + key[1:]
+            if best is None or effective < best_key:
+                best = job
+                best_key = effective
+        return best
+
+    def _take(self):
+        """Remove and return the next job to hand out, if any."""
+        now = self._clock()
+        while self._size > 0:
+            job = self._next(now)
+            self._dequeue(job)
+            if (self._drop_expired and job.deadline is not None
+                    and job.deadline < now):
+                job.state = Job.EXPIRED
+                continue
+            job.state = Job.TAKEN
+            return job
+        return None
+
+    def bump(self, job, priority):
+        """Change the priority of a waiting job.
+
+        Args:
+            job (Job): A job from this scheduler.
+            priority (float): The new priority.
+
+        Returns:
+            True if the job was still waiting, otherwise False.
+        """
+        with self._condition:
+            if job.state != Job.WAITING:
+                return False
+            if self._class(priority) == self._class(job.priority):
+                job.priority = priority
+                self._queues[self._class(priority)].update_key(
+                    job._element, self._key(job))
+            else:
+                self._dequeue(job)
+                job.priority = priority
+                self._enqueue(job)
+            return True
+
+    def cancel(self, job):
+        """Remove a waiting job from the scheduler.
+
+        Args:
+            job (Job): A job from this scheduler.
+
+        Returns:
+            True if the job was still waiting, otherwise False.
+        """
+        with self._condition:
+            if job.state != Job.WAITING:
+                return False
+            self._dequeue(job)
+            job.state = Job.CANCELLED
+            return True
+
+    def close(self):
+        """Stop accepting jobs and wake every waiting get.
+
+        Jobs already waiting can still be taken.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def benchmark(producers, consumers, jobs_per_producer=2000):
+    """Return the jobs per second moved through a scheduler by threads.
+
+    Args:
+        producers (int): Number of threads submitting jobs.
+        consumers (int): Number of threads taking jobs.
+        jobs_per_producer (int): Jobs each producer submits.
+    """
+    scheduler = JobScheduler(aging=0.01)
+
+    def produce(seed):
+        for i in range(jobs_per_producer):
+            job = scheduler.submit(i, priority=(seed * 7 + i) % 10)
+            if i % 10 == 0:
+                scheduler.bump(job, 0)
+            elif i % 25 == 0:
+                scheduler.cancel(job)
+
+    def consume():
+        while scheduler.get() is not None:
+            pass
+
+    start = perf_counter()
+    consumer_threads = [Thread(target=consume) for _ in range(consumers)]
+    producer_threads = [Thread(target=produce, args=(i,))
+                        for i in range(producers)]
+    for thread in consumer_threads + producer_threads:
+        thread.start()
+    for thread in producer_threads:
+        thread.join()
+    scheduler.close()
+    for thread in consumer_threads:
+        thread.join()
+    end = perf_counter()
+    return producers * jobs_per_producer / (end - start)
+
+
+def main():
+    print("{:>10}{:>10}{:>14}".format("producers", "consumers", "jobs/s"))
+    for producers, consumers in ((1, 1), (4, 1), (1, 4), (4, 4), (16, 16)):
+        rate = benchmark(producers, consumers)
+        print("{:>10}{:>10}{:>14.0f}".format(producers, consumers, rate))
+
+
+if __name__ == "__main__":
+    main()
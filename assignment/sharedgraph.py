@@ -0,0 +1,271 @@
+"""Graph stored in shared memory for use by multiple processes."""
+
+from array import array
+from bisect import bisect_left
+from multiprocessing import Pool, shared_memory
+from random import Random
+from time import time
+from apq import SearchableAPQ
+from routemap import RouteMap
+
+
+_HEADER = 4
+_ITEM = 8
+
+
+class SharedGraph:
+    """Read-only graph held as flat arrays in a shared memory block.
+
+    Vertices are numbered 0 to n - 1. The block holds, in order:
+
+    - a header of (n, number of adjacency entries, has coordinates, 0)
+    - offsets (n + 1 ints): the adjacency entries of vertex i are
+      offsets[i] to offsets[i + 1] - 1
+    - targets and weights: the opposite vertex and weight of each entry
+    - labels (n ints): the label of each vertex
+    - sorted labels and their vertex numbers, for lookup by label
+    - coordinates (2n floats): latitude and longitude of each vertex
+
+    Attaching to the block maps these arrays without copying them.
+    """
+
+    def __init__(self, shm, owner):
+        """Initialise a view over a shared memory block.
+
+        Use publish or attach rather than calling this directly.
+
+        Args:
+            shm (SharedMemory): The block holding the graph.
+            owner (bool): Whether this process created the block.
+        """
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        header = buf[:_HEADER * _ITEM].cast("q")
+        n, entries, has_coords = header[0], header[1], header[2]
+        header.release()
+        self._views = []
+        offset = _HEADER * _ITEM
+        sizes = [("_offsets", "q", n + 1), ("_targets", "q", entries),
+                 ("_weights", "d", entries), ("_labels", "q", n),
+                 ("_sorted_labels", "q", n), ("_sorted_ids", "q", n),
+                 ("_coords", "d", 2 * n if has_coords else 0)]
+        for attribute, typecode, length in sizes:
+            end = offset + length * _ITEM
+            view = buf[offset:end].cast(typecode)
+            self._views.append(view)
+            setattr(self, attribute, view)
+            offset = end
+        self._n = n
+        self._has_coords = bool(has_coords)
+
+    @classmethod
+    def publish(cls, graph, name=None):
+        """Copy a graph into a new shared memory block.
+
+        Vertex labels must be integers.
+
+        Args:
+            graph (Graph): The graph to publish. Coordinates are included
+                           if it is a RouteMap.
+            name (str): Name for the block. (Default: chosen by the system)
+
+        Returns:
+            A SharedGraph that owns the new block.
+        """
+        vertices = graph.vertices()
+        ids = {vertex: i for i, vertex in enumerate(vertices)}
+        offsets = array("q", [0])
+        targets = array("q")
+        weights = array("d")
+        for vertex in vertices:
+            for edge in graph.get_edges(vertex):
+                targets.append(ids[edge.opposite(vertex)])
+                weights.append(edge.element())
+            offsets.append(len(targets))
+        labels = array("q", [vertex.element() for vertex in vertices])
+        order = sorted(range(len(vertices)), key=labels.__getitem__)
+        sorted_labels = array("q", [labels[i] for i in order])
+        sorted_ids = array("q", order)
+        coords = array("d")
+        has_coords = hasattr(graph, "get_coordinates")
+        if has_coords:
+            for vertex in vertices:
+                coords.extend(graph.get_coordinates(vertex))
+        header = array("q", [len(vertices), len(targets), int(has_coords), 0])
+
+        parts = [header, offsets, targets, weights, labels, sorted_labels,
+                 sorted_ids, coords]
+        size = sum(len(part) * _ITEM for part in parts)
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=max(size, 1))
+        offset = 0
+        for part in parts:
+            data = part.tobytes()
+            shm.buf[offset:offset + len(data)] = data
+            offset += len(data)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a graph already published by another process.
+
+        Args:
+            name (str): The name of the shared memory block.
+        """
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def __enter__(self):
+        """Return the graph for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the graph, unlinking the block if this process owns it."""
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def name(self):
+        """Return the name of the shared memory block."""
+        return self._shm.name
+
+    def num_vertices(self):
+        """Return the total number of vertices in the graph."""
+        return self._n
+
+    def num_edges(self):
+        """Return the total number of edges in the graph."""
+        return len(self._targets) // 2
+
+    def label(self, i):
+        """Return the label of vertex i."""
+        return self._labels[i]
+
+    def get_index_by_label(self, label):
+        """Return the number of the vertex with label, or None if absent."""
+        i = bisect_left(self._sorted_labels, label)
+        if i < self._n and self._sorted_labels[i] == label:
+            return self._sorted_ids[i]
+        return None
+
+    def get_coordinates(self, i):
+        """Return the coordinates of vertex i, or None if not stored."""
+        if not self._has_coords:
+            return None
+        return (self._coords[2 * i], self._coords[2 * i + 1])
+
+    def degree(self, i):
+        """Return the degree of vertex i."""
+        return self._offsets[i + 1] - self._offsets[i]
+
+    def neighbours(self, i):
+        """Return the (opposite vertex, weight) pairs for the edges on i."""
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return zip(self._targets[start:end], self._weights[start:end])
+
+    def shortest_paths(self, source):
+        """Dijkstra's Algorithm for finding shortest paths from source.
+
+        Args:
+            source (int): Number of the start vertex.
+
+        Returns:
+            A (cost, predecessor) pair of arrays indexed by vertex number.
+            Unreached vertices have infinite cost; the source and unreached
+            vertices have predecessor -1.
+        """
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        cost = array("d", [float("inf")]) * self._n
+        predecessor = array("l", [-1]) * self._n
+        closed = bytearray(self._n)
+        opened = SearchableAPQ()
+        opened.add(0.0, source)
+        while len(opened) > 0:
+            vertex_cost, i = opened.remove_min()
+            cost[i] = vertex_cost
+            closed[i] = 1
+            for k in range(offsets[i], offsets[i + 1]):
+                j = targets[k]
+                if not closed[j]:
+                    new_cost = vertex_cost + weights[k]
+                    element = opened[j]
+                    if element is None:
+                        predecessor[j] = i
+                        opened.add(new_cost, j)
+                    elif new_cost < opened.get_key(element):
+                        predecessor[j] = i
+                        opened.update_key(element, new_cost)
+        return (cost, predecessor)
+
+    def sp(self, v, w):
+        """Get the shortest path between the vertices labelled v and w.
+
+        Args:
+            v (int): Label of the start vertex.
+            w (int): Label of the end vertex.
+
+        Returns:
+            A list of (label, cost) pairs on the path from v to w, or an
+            empty list if there is no path.
+        """
+        source = self.get_index_by_label(v)
+        i = self.get_index_by_label(w)
+        if source is None or i is None:
+            return []
+        cost, predecessor = self.shortest_paths(source)
+        if cost[i] == float("inf"):
+            return []
+        path = []
+        while i >= 0:
+            path.append((self._labels[i], cost[i]))
+            i = predecessor[i]
+        path.reverse()
+        return path
+
+    def close(self):
+        """Release the arrays and detach from the shared memory block."""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block once every process has closed it."""
+        self._shm.unlink()
+
+
+_worker_graph = None
+
+
+def _attach_worker(name):
+    """Pool initializer that attaches the worker to the shared graph."""
+    global _worker_graph
+    _worker_graph = SharedGraph.attach(name)
+
+
+def _worker_sp(v, w):
+    """Return the cost of the shortest path in the worker's shared graph."""
+    path = _worker_graph.sp(v, w)
+    return path[-1][1] if path else None
+
+
+def main():
+    routemap = RouteMap("corkCityData.txt")
+    labels = [vertex.element() for vertex in routemap.vertices()]
+    rng = Random(0)
+    queries = [(rng.choice(labels), rng.choice(labels)) for _ in range(40)]
+    graph = SharedGraph.publish(routemap)
+    # Only the shared copy is needed from here on
+    del routemap
+
+    with graph:
+        for workers in (1, 2, 4):
+            start = time()
+            with Pool(workers, _attach_worker, (graph.name(),)) as pool:
+                pool.starmap(_worker_sp, queries)
+            end = time()
+            print("{} workers: {}s".format(workers, round(end - start, 4)))
+
+
+if __name__ == "__main__":
+    main()
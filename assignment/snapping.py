@@ -0,0 +1,119 @@
+"""Batch snapping of coordinates onto a Route Map."""
+
+import numpy as np
+
+
+class CoordinateSnapper:
+    """Snap many coordinates at once to the vertices or edges of a route map.
+
+    The coordinates of the vertices are copied into NumPy arrays when the
+    snapper is created, and those of the edges on the first call to
+    nearest_edges, so build it once and reuse it for every batch while the
+    route map is unchanged.
+    """
+
+    def __init__(self, routemap, chunk_size=1 << 22):
+        """Initialise a new snapper.
+
+        Args:
+            routemap (RouteMap): The route map to snap onto.
+            chunk_size (int): Maximum number of point-to-vertex distances to
+                              hold in memory at once. (Default: 4M)
+        """
+        self._chunk_size = chunk_size
+        self._routemap = routemap
+        self._vertex_ids = routemap._vertex_ids
+        # The route map keeps the coordinates of vertex id i at rows i of a
+        # flat array, so they are copied in one go rather than per vertex
+        coords = np.frombuffer(routemap._coords, dtype=np.float64)
+        coords = coords.reshape(-1, 2)
+        if routemap.num_vertices() < len(self._vertex_ids):
+            # Removed vertices leave their ids and coordinates behind
+            self._ids = np.array([i for i, vertex
+                                  in enumerate(self._vertex_ids)
+                                  if vertex is not None], dtype=np.intp)
+            self._coords = coords[self._ids]
+        else:
+            self._ids = None
+            self._coords = coords.copy()
+        self._edges = None
+
+    def _load_edges(self):
+        """Copy the start and direction of every edge into NumPy arrays."""
+        self._edges = self._routemap.edges()
+        ends = np.array([(e.start().index(), e.end().index())
+                         for e in self._edges], dtype=np.intp).reshape(-1, 2)
+        coords = np.frombuffer(self._routemap._coords, dtype=np.float64)
+        coords = coords.reshape(-1, 2)
+        self._starts = coords[ends[:, 0]]
+        self._vectors = coords[ends[:, 1]] - self._starts
+        self._lengths = np.einsum("ij,ij->i", self._vectors, self._vectors)
+
+    def _chunks(self, points, columns):
+        """Yield slices of points so no chunk has over chunk_size cells."""
+        step = max(1, self._chunk_size // max(1, columns))
+        for start in range(0, len(points), step):
+            yield slice(start, start + step)
+
+    def nearest_vertices(self, points):
+        """Return the closest vertex to each point.
+
+        Args:
+            points (array-like): Sequence of (latitude, longitude) pairs.
+
+        Returns:
+            A (vertices, distances) pair: a list with the closest vertex to
+            each point and an array of the distances to them.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self._coords) == 0:
+            return ([None] * len(points), np.full(len(points), np.inf))
+        indices = np.empty(len(points), dtype=np.intp)
+        distances = np.empty(len(points))
+        for chunk in self._chunks(points, len(self._coords)):
+            diff = points[chunk, None, :] - self._coords[None, :, :]
+            squared = np.einsum("ijk,ijk->ij", diff, diff)
+            nearest = squared.argmin(axis=1)
+            indices[chunk] = nearest
+            distances[chunk] = np.sqrt(
+                squared[np.arange(len(nearest)), nearest])
+        if self._ids is not None:
+            indices = self._ids[indices]
+        vertex_ids = self._vertex_ids
+        return ([vertex_ids[i] for i in indices], distances)
+
+    def nearest_edges(self, points):
+        """Return the closest edge to each point and where it projects onto it.
+
+        Args:
+            points (array-like): Sequence of (latitude, longitude) pairs.
+
+        Returns:
+            A (edges, offsets, distances) triple: a list with the closest
+            edge to each point, an array of the offsets along those edges as
+            a fraction from their start vertex (0) to their end vertex (1),
+            and an array of the distances to the projected points.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self._edges is None:
+            self._load_edges()
+        if len(self._edges) == 0:
+            return ([None] * len(points), np.full(len(points), np.nan),
+                    np.full(len(points), np.inf))
+        indices = np.empty(len(points), dtype=np.intp)
+        offsets = np.empty(len(points))
+        distances = np.empty(len(points))
+        # Zero length edges project everything onto their start vertex
+        lengths = np.where(self._lengths > 0, self._lengths, 1.0)
+        for chunk in self._chunks(points, 2 * len(self._edges)):
+            diff = points[chunk, None, :] - self._starts[None, :, :]
+            t = np.einsum("ijk,jk->ij", diff, self._vectors) / lengths
+            np.clip(t, 0.0, 1.0, out=t)
+            diff -= t[:, :, None] * self._vectors[None, :, :]
+            squared = np.einsum("ijk,ijk->ij", diff, diff)
+            nearest = squared.argmin(axis=1)
+            rows = np.arange(len(nearest))
+            indices[chunk] = nearest
+            offsets[chunk] = t[rows, nearest]
+            distances[chunk] = np.sqrt(squared[rows, nearest])
+        return ([self._edges[i] for i in indices], offsets, distances)
@@ -0,0 +1,241 @@
+"""Tiled storage of Route Maps for loading only a region of interest.
+
+A tile index is a directory with:
+
+- index.txt: "tile_size <size>" followed by one "row col" line per tile.
+- tile_<row>_<col>.txt: the vertices in the tile and the edges between
+  them, in the same format as read_route_graph reads.
+- tile_<row>_<col>.links: one "label other time row col" line for every
+  edge from a vertex in the tile to a vertex in another tile.
+
+A tile covers latitudes row * size to (row + 1) * size and longitudes
+col * size to (col + 1) * size.
+"""
+
+import os
+from math import floor
+from routemap import RouteMap
+
+
+def tile_of(coordinates, tile_size):
+    """Return the (row, col) of the tile containing the coordinates.
+
+    Args:
+        coordinates (tuple): A (latitude, longitude) pair.
+        tile_size (float): The size of a tile in degrees.
+    """
+    return (floor(coordinates[0] / tile_size),
+            floor(coordinates[1] / tile_size))
+
+
+def _tile_file(directory, tile, extension):
+    return os.path.join(directory, "tile_{}_{}.{}".format(tile[0], tile[1],
+                                                          extension))
+
+
+def build_tile_index(filename, directory, tile_size):
+    """Split a route map file into tiles that can be loaded on their own.
+
+    The file is read once, without building a route map.
+
+    Args:
+        filename (str): The path to the route map file.
+        directory (str): The directory to write the tiles into.
+        tile_size (float): The size of a tile in degrees.
+
+    Returns:
+        The number of tiles written.
+    """
+    tile_of_node = {}
+    nodes = {}
+    edges = {}
+    links = {}
+    with open(filename, "r") as file:
+        entry = file.readline()
+        while entry == "Node\n":
+            nodeid = int(file.readline().split()[1])
+            gps = file.readline().split()
+            latitude = round(float(gps[1]), 6)
+            longitude = round(float(gps[2]), 6)
+            tile = tile_of((latitude, longitude), tile_size)
+            tile_of_node[nodeid] = tile
+            nodes.setdefault(tile, []).append(
+                "Node\nid: {}\ngps: {} {}\n".format(nodeid, latitude,
+                                                    longitude))
+            entry = file.readline()
+        while entry == "Edge\n":
+            source = int(file.readline().split()[1])
+            target = int(file.readline().split()[1])
+            length = file.readline().split()[1]
+            edge_time = file.readline().split()[1]
+            file.readline()  # Oneway
+            entry = file.readline()
+            source_tile = tile_of_node[source]
+            target_tile = tile_of_node[target]
+            if source_tile == target_tile:
+                edges.setdefault(source_tile, []).append(
+                    "Edge\nfrom: {}\nto: {}\nlength: {}\ntime: {}\n"
+                    "oneway: N\n".format(source, target, length, edge_time))
+            else:
+                links.setdefault(source_tile, []).append(
+                    "{} {} {} {} {}\n".format(source, target, edge_time,
+                                              *target_tile))
+                links.setdefault(target_tile, []).append(
+                    "{} {} {} {} {}\n".format(target, source, edge_time,
+                                              *source_tile))
+
+    os.makedirs(directory, exist_ok=True)
+    for tile in nodes:
+        with open(_tile_file(directory, tile, "txt"), "w") as file:
+            file.writelines(nodes[tile])
+            file.writelines(edges.get(tile, ()))
+        with open(_tile_file(directory, tile, "links"), "w") as file:
+            file.writelines(links.get(tile, ()))
+    with open(os.path.join(directory, "index.txt"), "w") as file:
+        file.write("tile_size {}\n".format(tile_size))
+        for tile in nodes:
+            file.write("{} {}\n".format(*tile))
+    return len(nodes)
+
+
+class TiledRouteMap(RouteMap):
+    """Route map that loads tiles of a tile index only when needed.
+
+    Starts with the tiles of a region of interest. When a search reaches a
+    vertex with edges into tiles that are not loaded, those tiles are read
+    in before the vertex's edges are returned, so searches run as if the
+    whole map were loaded while memory grows only with the area they visit.
+
+    Vertices are only known once their tile is loaded, so look up labels
+    within the region of interest, or load their tiles first.
+    """
+
+    def __init__(self, directory, bbox=None, tiles=None):
+        """Initialise a new tiled route map.
+
+        Args:
+            directory (str): The directory of the tile index.
+            bbox (tuple): (min_lat, min_lon, max_lat, max_lon) of the region
+                          of interest to load. (Default: None)
+            tiles (iterable): (row, col) tiles to load. (Default: None)
+        """
+        super().__init__()
+        self._directory = directory
+        self._available_tiles = set()
+        self._loaded_tiles = set()
+        self._pending_links = {}
+        with open(os.path.join(directory, "index.txt"), "r") as file:
+            self._tile_size = float(file.readline().split()[1])
+            for line in file:
+                row, col = line.split()
+                self._available_tiles.add((int(row), int(col)))
+        to_load = list(tiles) if tiles is not None else []
+        if bbox is not None:
+            to_load.extend(self.tiles_in_bbox(bbox))
+        for tile in to_load:
+            self.load_tile(tile)
+
+    def tiles_in_bbox(self, bbox):
+        """Return the available tiles overlapping a bounding box.
+
+        Args:
+            bbox (tuple): (min_lat, min_lon, max_lat, max_lon).
+        """
+        min_row, min_col = tile_of((bbox[0], bbox[1]), self._tile_size)
+        max_row, max_col = tile_of((bbox[2], bbox[3]), self._tile_size)
+        return [(row, col)
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in self._available_tiles]
+
+    def loaded_tiles(self):
+        """Return the set of tiles that have been loaded."""
+        return set(self._loaded_tiles)
+
+    def load_tile(self, tile):
+        """Load a tile and join it to the neighbouring tiles already loaded.
+
+        Args:
+            tile (tuple): The (row, col) of the tile.
+
+        Returns:
+            True if the tile was loaded, False if it was already loaded or is
+            not in the index.
+        """
+        if tile in self._loaded_tiles or tile not in self._available_tiles:
+            return False
+        self._loaded_tiles.add(tile)
+        # Tiles are paged in during searches, so they are read quietly
+        self._read_route_entries(_tile_file(self._directory, tile, "txt"))
+        with open(_tile_file(self._directory, tile, "links"), "r") as file:
+            for line in file:
+                label, other, edge_time, row, col = line.split()
+                vertex = self.get_vertex_by_label(int(label))
+                other_tile = (int(row), int(col))
+                if other_tile in self._loaded_tiles:
+                    other_vertex = self.get_vertex_by_label(int(other))
+                    self.add_edge(vertex, other_vertex, float(edge_time))
+                else:
+                    self._pending_links.setdefault(vertex, set()).add(
+                        other_tile)
+        return True
+
+    def _page_in(self, v):
+        """Load the tiles that edges on v lead into."""
+        tiles = self._pending_links.pop(v, None)
+        if tiles:
+            for tile in tiles:
+                self.load_tile(tile)
+
+    def get_edges(self, v):
+        """Return a list of all the edges incident on v, loading tiles.
+
+        Args:
+            v (Vertex): The vertex to get the edges of.
+        """
+        self._page_in(v)
+        return super().get_edges(v)
+
+    def _neighbours(self, v):
+        """Return the (opposite vertex, edge) pairs, loading tiles."""
+        self._page_in(v)
+        return super()._neighbours(v)
+
+    def remove_vertex(self, v):
+        """Remove vertex v and all incident edges on it.
+
+        Args:
+            v (Vertex): Vertex to be removed.
+        """
+        super().remove_vertex(v)
+        self._pending_links.pop(v, None)
+
+    def sp(self, v, w):
+        """Get the shortest path from vertex v to w, loading tiles as needed.
+
+        Args:
+            v (Vertex): Start vertex in the path.
+            w (Vertex): End vertex in the path.
+
+        Returns:
+            A list of the vertices on the path from v to w with their costs,
+            or an empty list if w cannot be reached from v.
+        """
+        # The component index only covers the loaded tiles. Stopping at w
+        # keeps the tiles paged in to those within its cost of v
+        return self.shortest_paths(v, target=w).path_to(w)
+
+
+def main():
+    build_tile_index("corkCityData.txt", "corkCityTiles", 0.01)
+    routemap = TiledRouteMap("corkCityTiles",
+                             bbox=(51.89, -8.50, 51.90, -8.48))
+    print("Loaded tiles: {}".format(len(routemap.loaded_tiles())))
+    source = routemap.get_vertex_by_coordinates((51.893, -8.492))
+    target = routemap.get_vertex_by_coordinates((51.899, -8.485))
+    routemap.print_path(routemap.sp(source, target))
+    print("Loaded tiles: {}".format(len(routemap.loaded_tiles())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Streaming top-k selection with the Adaptable Priority Queue."""
+
+from apq import AdaptablePQ
+
+
+class _Reversed:
+    """Key wrapper that reverses the order of the key it holds."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+class TopK:
+    """Bounded selector for the k best items of a stream.
+
+    Holds at most k items in an AdaptablePQ with the worst kept item at the
+    root. An item better than the root replaces it with replace_min, a
+    single sift down, so each item pushed costs O(log k) and memory is
+    O(k). Items with equal keys are kept in the order they were pushed.
+    """
+
+    def __init__(self, k, largest=True):
+        """Initialise a new selector.
+
+        Args:
+            k (int): Number of items to keep.
+            largest (bool): Keep the items with the largest keys, otherwise
+                            the smallest. (Default: True)
+        """
+        if k < 0:
+            raise ValueError("k must not be negative")
+        self._k = k
+        self._largest = largest
+        # The queue holds the sequence numbers of the kept items, which
+        # are mapped to their (key, value) pairs here
+        self._queue = AdaptablePQ()
+        self._kept = {}
+        self._sequence = 0
+
+    def __len__(self):
+        """Return the number of items kept."""
+        return len(self._queue)
+
+    def _entry(self, key):
+        """Return the queue key for a key pushed now."""
+        if self._largest:
+            # Later items compare lower, so they are dropped first
+            return (key, -self._sequence)
+        return _Reversed((key, self._sequence))
+
+    def push(self, key, value):
+        """Offer an item to the selector.
+
+        Args:
+            key (any): The key to select by.
+            value (any): The item.
+
+        Returns:
+            True if the item is kept, otherwise False.
+        """
+        if self._k == 0:
+            return False
+        sequence = self._sequence
+        entry = self._entry(key)
+        self._sequence += 1
+        queue = self._queue
+        if len(queue) < self._k:
+            queue.add(entry, sequence)
+        else:
+            worst, worst_sequence = queue.get_min()
+            if not worst < entry:
+                return False
+            del self._kept[worst_sequence]
+            queue.replace_min(entry, sequence)
+        self._kept[sequence] = (key, value)
+        return True
+
+    def extend(self, iterable, key=None):
+        """Offer every item of an iterable to the selector.
+
+        Args:
+            iterable (iterable): The items to offer.
+            key (callable): Function of an item giving its key.
+                            (Default: the item itself)
+        """
+        for item in iterable:
+            self.push(item if key is None else key(item), item)
+
+    def items(self):
+        """Return the kept (key, value) pairs, best first."""
+        # Sort by push order, then stably by key, so equal keys keep it
+        pairs = [self._kept[sequence] for sequence in sorted(self._kept)]
+        pairs.sort(key=lambda pair: pair[0], reverse=self._largest)
+        return pairs
+
+
+def nlargest(iterable, k, key=None):
+    """Return the k largest items of an iterable, largest first.
+
+    Args:
+        iterable (iterable): The items to select from.
+        k (int): Number of items to return.
+        key (callable): Function of an item to compare by. (Default: None)
+    """
+    selector = TopK(k, largest=True)
+    selector.extend(iterable, key)
+    return [value for _, value in selector.items()]
+
+
+def nsmallest(iterable, k, key=None):
+    """Return the k smallest items of an iterable, smallest first.
+
+    Args:
+        iterable (iterable): The items to select from.
+        k (int): Number of items to return.
+        key (callable): Function of an item to compare by. (Default: None)
+    """
+    selector = TopK(k, largest=False)
+    selector.extend(iterable, key)
+    return [value for _, value in selector.items()]
@@ -0,0 +1,175 @@
+"""Benchmarks for the sorts and heaps over sizes and input distributions."""
+
+import tracemalloc
+from random import Random
+from time import perf_counter
+from binaryheap import heapsort
+from insertion_sort import insertion_sort
+from merge_sort import merge_sort
+
+
+def _builtin(mylist):
+    """Sort a list in place with the built-in sort."""
+    mylist.sort()
+
+
+SORTS = {
+    "insertion": insertion_sort,
+    "merge": merge_sort,
+    "heap": heapsort,
+    "builtin": _builtin,
+}
+
+# Largest input each sort is run on by default, so slow sorts are skipped
+LIMITS = {
+    "insertion": 10**4,
+    "merge": 10**6,
+    "heap": 10**6,
+    "builtin": 10**7,
+}
+
+
+def _random(n, rng):
+    return [rng.random() for _ in range(n)]
+
+
+def _sorted(n, rng):
+    return sorted(_random(n, rng))
+
+
+def _reversed(n, rng):
+    return sorted(_random(n, rng), reverse=True)
+
+
+def _few_unique(n, rng):
+    return [rng.randrange(10) for _ in range(n)]
+
+
+def _nearly_sorted(n, rng):
+    items = _sorted(n, rng)
+    # Swap 1% of the items with a random other item
+    for _ in range(max(1, n // 100)):
+        i = rng.randrange(n)
+        j = rng.randrange(n)
+        items[i], items[j] = items[j], items[i]
+    return items
+
+
+DISTRIBUTIONS = {
+    "random": _random,
+    "sorted": _sorted,
+    "reversed": _reversed,
+    "few-unique": _few_unique,
+    "nearly-sorted": _nearly_sorted,
+}
+
+
+class _Counted:
+    """Wrap a value to count how often it is compared."""
+
+    __slots__ = ("value",)
+    comparisons = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        _Counted.comparisons += 1
+        return self.value < other.value
+
+
+def count_comparisons(sort, items):
+    """Return the number of comparisons made to sort a copy of items."""
+    to_sort = [_Counted(item) for item in items]
+    _Counted.comparisons = 0
+    sort(to_sort)
+    return _Counted.comparisons
+
+
+def measure(sort, items, repeat=1):
+    """Return the fastest time and the peak memory allocated by a sort.
+
+    Args:
+        sort (callable): Sorts a list in place.
+        items (list): The items to sort a copy of.
+        repeat (int): Number of timed sorts. (Default: 1)
+
+    Returns:
+        A (seconds, peak_bytes) pair.
+    """
+    best = None
+    for _ in range(repeat):
+        to_sort = list(items)
+        start = perf_counter()
+        sort(to_sort)
+        seconds = perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    to_sort = list(items)
+    tracemalloc.start()
+    sort(to_sort)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (best, peak)
+
+
+def run(sizes=(10, 100, 10**3, 10**4, 10**5, 10**6, 10**7), sorts=None,
+        distributions=None, limits=None, count_limit=10**5, seed=0):
+    """Benchmark each sort on each distribution and size, printing a table.
+
+    Args:
+        sizes (tuple): Lengths of the lists to sort.
+                       (Default: powers of 10 from 10 to 10^7)
+        sorts (list): Names of the sorts in SORTS to run. (Default: all)
+        distributions (list): Names of the distributions in DISTRIBUTIONS
+                              to sort. (Default: all)
+        limits (dict): Largest size to run each sort on.
+                       (Default: LIMITS)
+        count_limit (int): Largest size to count comparisons for, as the
+                           counting wrappers are slow. (Default: 10^5)
+        seed (int): Seed for the generated inputs. (Default: 0)
+
+    Returns:
+        A list of dictionaries, one for each measurement, of the
+        distribution, size, sort, seconds, comparisons (None if not
+        counted) and peak bytes.
+    """
+    if sorts is None:
+        sorts = list(SORTS)
+    if distributions is None:
+        distributions = list(DISTRIBUTIONS)
+    if limits is None:
+        limits = LIMITS
+    results = []
+    print("{:<15}{:>10}{:<2}{:<11}{:>12}{:>14}{:>12}".format(
+        "distribution", "n", "", "sort", "time (ms)", "comparisons",
+        "peak (KiB)"))
+    for distribution in distributions:
+        for n in sizes:
+            items = DISTRIBUTIONS[distribution](n, Random(seed))
+            for name in sorts:
+                if n > limits.get(name, n):
+                    continue
+                sort = SORTS[name]
+                # Repeat small sorts so their times are not just noise
+                seconds, peak = measure(sort, items,
+                                        repeat=max(1, 10000 // n))
+                comparisons = None
+                if n <= count_limit:
+                    comparisons = count_comparisons(sort, items)
+                results.append({"distribution": distribution, "n": n,
+                                "sort": name, "seconds": seconds,
+                                "comparisons": comparisons, "peak": peak})
+                print("{:<15}{:>10}{:<2}{:<11}{:>12.3f}{:>14}{:>12.1f}".format(
+                    distribution, n, "", name, seconds * 1000,
+                    "-" if comparisons is None else comparisons,
+                    peak / 1024))
+    return results
+
+
+def main():
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,43 @@
 """Min and Max Binary Heaps."""
 
+from random import random
+from time import perf_counter
+
+
 class _BinaryHeap:
-    """Base Binary Heap."""
+    """Base Binary Heap.
+
+    With a key function, the key of each item is computed once and kept in
+    a list alongside the items, moving with them. Without one, the items
+    are their own keys and both names refer to the same list.
+    """
+
+    def __init__(self, items=None, key=None):
+        """Initialise a new Heap.
+
+        Args:
+            items (iterable): Items to build the heap from in O(n) time.
+                              (Default: None)
+            key (callable): Function of an item to order the heap by.
+                            (Default: None)
+        """
+        self._key = key
+        self._adopt([] if items is None else list(items))
+
+    def _adopt(self, body):
+        """Make the heap use body as its list of items, and heapify it."""
+        self._body = body
+        self._size = len(body)
+        if self._key is None:
+            self._keys = body
+        else:
+            self._keys = [self._key(item) for item in body]
+        self._heapify()
 
-    def __init__(self):
-        """Initialise a new Heap."""
-        self._body = []
-        self._size = 0
+    def _heapify(self):
+        """Restore the heap property over the whole list, bottom-up."""
+        for i in range(self._size // 2 - 1, -1, -1):
+            self.bubbledown(i)
 
     def size(self):
         """Return the size of the heap."""
@@ -15,24 +46,67 @@ class _BinaryHeap:
     def add(self, item):
         """Add item to the heap."""
         self._body.append(item)
+        if self._key is not None:
+            self._keys.append(self._key(item))
         self.bubbleup(self._size)
         self._size += 1
 
     def add_from_list(self, inlist):
-        """Add a list of items to the heap."""
-        for item in inlist:
-            self.add(item)
+        """Add a list of items to the heap.
+
+        When at least as many items are added as are already in the heap,
+        the heap is rebuilt bottom-up in O(n) rather than adding each item.
+        """
+        inlist = list(inlist)
+        if len(inlist) < self._size:
+            for item in inlist:
+                self.add(item)
+            return
+        self._body.extend(inlist)
+        if self._key is not None:
+            self._keys.extend(self._key(item) for item in inlist)
+        self._size = len(self._body)
+        self._heapify()
 
     def swap(self, i, j):
         """Swap the two items at the given indices."""
-        self._body[i], self._body[j] = self._body[j], self._body[i]
+        body = self._body
+        body[i], body[j] = body[j], body[i]
+        if self._key is not None:
+            keys = self._keys
+            keys[i], keys[j] = keys[j], keys[i]
+
+    def _remove_top(self):
+        """Remove and return the item at the top of the heap, if any."""
+        if self._size == 0:
+            return None
+        body = self._body
+        top = body[0]
+        last = body.pop()
+        if self._key is not None:
+            last_key = self._keys.pop()
+        self._size -= 1
+        if self._size > 0:
+            body[0] = last
+            if self._key is not None:
+                self._keys[0] = last_key
+            self.bubbledown(0)
+        return top
+
 
 class MinHeap(_BinaryHeap):
     """Minimum Binary Heap with smallest value at the top."""
 
-    def __init__(self):
-        """Initialise a new Min Heap."""
-        super().__init__()
+    def __init__(self, items=None, key=None):
+        """Initialise a new Min Heap.
+
+        Args:
+            items (iterable): Items to build the heap from in O(n) time.
+                              (Default: None)
+            key (callable): Function of an item to order the heap by.
+                            (Default: None)
+        """
+        super().__init__(items, key)
 
     def get_min(self):
         """Return the smallest value in the heap."""
@@ -42,40 +116,82 @@ class MinHeap(_BinaryHeap):
 
     def remove_min(self):
         """Remove and return the smallest value in the heap."""
-        min_value = self.get_min()
-        if min_value:
-            last_pos = self._size - 1
-            self._body[0] = self._body[last_pos]
-            del self._body[last_pos]
-            self._size -= 1
-            self.bubbledown(0)
-        return min_value
+        return self._remove_top()
+
+    def replace_min(self, item):
+        """Remove the smallest value and add item, with a single sift.
+
+        Returns:
+            The smallest value before item was added, or None if empty.
+        """
+        if self._size == 0:
+            self.add(item)
+            return None
+        top = self._body[0]
+        self._body[0] = item
+        if self._key is not None:
+            self._keys[0] = self._key(item)
+        self.bubbledown(0)
+        return top
 
     def bubbleup(self, i):
-        parent = (i - 1) // 2
-        if parent >= 0 and self._body[i] < self._body[parent]:
-            self.swap(i, parent)
-            self.bubbleup(parent)
+        """Move the item at index i up until its parent is not larger."""
+        body = self._body
+        keys = self._keys
+        item = body[i]
+        key = keys[i]
+        while i > 0:
+            parent = (i - 1) // 2
+            if not key < keys[parent]:
+                break
+            body[i] = body[parent]
+            keys[i] = keys[parent]
+            i = parent
+        body[i] = item
+        keys[i] = key
 
     def bubbledown(self, i, last=None):
-        if not last:
+        """Move the item at index i down until no child is smaller.
+
+        Args:
+            i (int): Index of the item to move.
+            last (int): Index just past the end of the heap.
+                        (Default: the size of the heap)
+        """
+        if last is None:
             last = self._size
-        left = 2 * i + 1
-        right = 2 * i + 2
-        minchild = left
-        if right < last and self._body[right] < self._body[left]:
-            minchild = right
-        if left < last and self._body[i] > self._body[minchild]:
-            self.swap(i, minchild)
-            self.bubbledown(minchild)
+        body = self._body
+        keys = self._keys
+        item = body[i]
+        key = keys[i]
+        child = 2 * i + 1
+        while child < last:
+            right = child + 1
+            if right < last and keys[right] < keys[child]:
+                child = right
+            if not keys[child] < key:
+                break
+            body[i] = body[child]
+            keys[i] = keys[child]
+            i = child
+            child = 2 * i + 1
+        body[i] = item
+        keys[i] = key
 
 
 class MaxHeap(_BinaryHeap):
     """Maximum Binary Heap with largest value at the top."""
 
-    def __init__(self):
-        """Initialise a new Max Heap."""
-        super().__init__()
+    def __init__(self, items=None, key=None):
+        """Initialise a new Max Heap.
+
+        Args:
+            items (iterable): Items to build the heap from in O(n) time.
+                              (Default: None)
+            key (callable): Function of an item to order the heap by.
+                            (Default: None)
+        """
+        super().__init__(items, key)
 
     def get_max(self):
         """Return the largest value in the heap."""
@@ -85,29 +201,121 @@ class MaxHeap(_BinaryHeap):
 
     def remove_max(self):
         """Remove and return the largest value in the heap."""
-        min_value = self.get_max()
-        if min_value:
-            last_pos = self._size - 1
-            self._body[0] = self._body[last_pos]
-            del self._body[last_pos]
-            self._size -= 1
-            self.bubbledown(0)
-        return min_value
+        return self._remove_top()
+
+    def replace_max(self, item):
+        """Remove the largest value and add item, with a single sift.
+
+        Returns:
+            The largest value before item was added, or None if empty.
+        """
+        if self._size == 0:
+            self.add(item)
+            return None
+        top = self._body[0]
+        self._body[0] = item
+        if self._key is not None:
+            self._keys[0] = self._key(item)
+        self.bubbledown(0)
+        return top
 
     def bubbleup(self, i):
-        parent = (i - 1) // 2
-        if parent >= 0 and self._body[i] > self._body[parent]:
-            self.swap(i, parent)
-            self.bubbleup(parent)
+        """Move the item at index i up until its parent is not smaller."""
+        body = self._body
+        keys = self._keys
+        item = body[i]
+        key = keys[i]
+        while i > 0:
+            parent = (i - 1) // 2
+            if not keys[parent] < key:
+                break
+            body[i] = body[parent]
+            keys[i] = keys[parent]
+            i = parent
+        body[i] = item
+        keys[i] = key
 
     def bubbledown(self, i, last=None):
-        if not last:
+        """Move the item at index i down until no child is larger.
+
+        Args:
+            i (int): Index of the item to move.
+            last (int): Index just past the end of the heap.
+                        (Default: the size of the heap)
+        """
+        if last is None:
             last = self._size
-        left = 2 * i + 1
-        right = 2 * i + 2
-        minchild = left
-        if right < last and self._body[right] > self._body[left]:
-            minchild = right
-        if left < last and self._body[i] < self._body[minchild]:
-            self.swap(i, minchild)
-            self.bubbledown(minchild)
+        body = self._body
+        keys = self._keys
+        item = body[i]
+        key = keys[i]
+        child = 2 * i + 1
+        while child < last:
+            right = child + 1
+            if right < last and keys[child] < keys[right]:
+                child = right
+            if not key < keys[child]:
+                break
+            body[i] = body[child]
+            keys[i] = keys[child]
+            i = child
+            child = 2 * i + 1
+        body[i] = item
+        keys[i] = key
+
+
+def heapsort(mylist, key=None, reverse=False):
+    """Sort a list in place with a binary heap.
+
+    The heap is built over mylist itself, so no copy of the items is made.
+    A key function needs one extra list of the keys. Heapsort is not
+    stable: items with equal keys may change order.
+
+    Args:
+        mylist (list): The list to sort.
+        key (callable): Function of an item to sort by. (Default: None)
+        reverse (bool): Sort in descending order. (Default: False)
+    """
+    # The top of the heap is swapped to the end each time, so a max heap
+    # leaves the list ascending
+    heap = MinHeap(key=key) if reverse else MaxHeap(key=key)
+    heap._adopt(mylist)
+    keys = heap._keys
+    bubbledown = heap.bubbledown
+    for end in range(len(mylist) - 1, 0, -1):
+        mylist[0], mylist[end] = mylist[end], mylist[0]
+        if key is not None:
+            keys[0], keys[end] = keys[end], keys[0]
+        bubbledown(0, end)
+
+
+def _time(function, *args):
+    """Return the seconds taken by a call."""
+    start = perf_counter()
+    function(*args)
+    return perf_counter() - start
+
+
+def _add_each(items):
+    """Build a heap by adding one item at a time."""
+    heap = MinHeap()
+    for item in items:
+        heap.add(item)
+    return heap
+
+
+def main():
+    print("{:>10}{:>14}{:>14}{:>14}{:>14}".format(
+        "n", "add (ms)", "heapify (ms)", "heapsort (ms)", "sorted (ms)"))
+    for n in (1000, 10000, 100000, 1000000):
+        items = [random() for _ in range(n)]
+        add = _time(_add_each, items)
+        heapify = _time(MinHeap, items)
+        heapsorted = _time(heapsort, list(items))
+        builtin = _time(sorted, items)
+        print("{:>10}{:>14.1f}{:>14.1f}{:>14.1f}{:>14.1f}".format(
+            n, add * 1000, heapify * 1000, heapsorted * 1000, builtin * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""External merge sort for line files larger than memory."""
+
+import os
+import tempfile
+from random import random
+from sys import getsizeof
+from time import perf_counter
+from kmerge import kmerge
+from merge_sort import merge_sort
+
+
+def _read_chunk(lines, memory):
+    """Return the next lines that fit in memory bytes."""
+    chunk = []
+    size = 0
+    for line in lines:
+        if not line.endswith("\n"):
+            line += "\n"
+        chunk.append(line)
+        # Each line costs its string, its slot in the list and its slot in
+        # merge_sort's auxiliary list
+        size += getsizeof(line) + 16
+        if size >= memory:
+            break
+    return chunk
+
+
+def _write_run(chunk, tmpdir, buffer_size):
+    """Write sorted lines to a new temporary file, rewound for reading."""
+    run = tempfile.TemporaryFile("w+", buffering=buffer_size,
+                                 encoding="utf-8", dir=tmpdir)
+    run.writelines(chunk)
+    run.seek(0)
+    return run
+
+
+def external_sort(lines, key=None, memory=64 * 2**20, fan_in=64,
+                  tmpdir=None, buffer_size=2**16):
+    """Sort lines that may not fit in memory, yielding them in order.
+
+    Lines are read into chunks of about memory bytes, each chunk is sorted
+    with merge_sort and spilled to a temporary file as a sorted run, and
+    the runs are merged with kmerge. If there are more runs than
+    fan_in, groups of them are merged into longer runs first. Input that
+    fits in one chunk is sorted without touching the disk. The sort is
+    stable, and every line is given a trailing newline.
+
+    Args:
+        lines (iterable): The lines to sort, e.g. an open file.
+        key (callable): Function of a line to sort by. (Default: None)
+        memory (int): Bytes of lines to hold in memory at once.
+                      (Default: 64 MiB)
+        fan_in (int): Most runs to merge at once. (Default: 64)
+        tmpdir (str): Directory for the runs. (Default: the system's)
+        buffer_size (int): Bytes buffered for each run file, while merging
+                           fan_in of these are held on top of memory.
+                           (Default: 64 KiB)
+
+    Yields:
+        The lines in sorted order.
+    """
+    if fan_in < 2:
+        raise ValueError("Cannot merge fewer than 2 runs at once")
+    lines = iter(lines)
+    runs = []
+    try:
+        while True:
+            chunk = _read_chunk(lines, memory)
+            if not chunk:
+                break
+            merge_sort(chunk, key=key)
+            if not runs:
+                following = next(lines, None)
+                if following is None:
+                    # Everything fitted in memory
+                    yield from chunk
+                    return
+                lines = _chain(following, lines)
+            runs.append(_write_run(chunk, tmpdir, buffer_size))
+            del chunk
+        while len(runs) > fan_in:
+            merged = []
+            for i in range(0, len(runs), fan_in):
+                group = runs[i:i + fan_in]
+                merged.append(_write_run(kmerge(*group, key=key), tmpdir,
+                                         buffer_size))
+                for run in group:
+                    run.close()
+            runs = merged
+        yield from kmerge(*runs, key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _chain(first, rest):
+    """Yield first, then everything in rest."""
+    yield first
+    yield from rest
+
+
+def sort_file(infile, outfile, key=None, memory=64 * 2**20, fan_in=64,
+              tmpdir=None, buffer_size=2**16):
+    """Sort the lines of infile into outfile with an external merge sort.
+
+    Args:
+        infile (str): Path of the file to sort.
+        outfile (str): Path to write the sorted lines to.
+        key (callable): Function of a line to sort by. (Default: None)
+        memory (int): Bytes of lines to hold in memory at once.
+                      (Default: 64 MiB)
+        fan_in (int): Most runs to merge at once. (Default: 64)
+        tmpdir (str): Directory for the runs. (Default: the directory of
+                      outfile)
+        buffer_size (int): Bytes buffered for each file. (Default: 64 KiB)
+    """
+    if tmpdir is None:
+        tmpdir = os.path.dirname(os.path.abspath(outfile))
+    with open(infile, encoding="utf-8", buffering=buffer_size) as source, \
+            open(outfile, "w", encoding="utf-8",
+                 buffering=buffer_size) as target:
+        target.writelines(external_sort(source, key, memory, fan_in, tmpdir,
+                                        buffer_size))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        infile = os.path.join(directory, "edges.txt")
+        outfile = os.path.join(directory, "sorted.txt")
+        with open(infile, "w", encoding="utf-8") as file:
+            for i in range(200000):
+                file.write("{:.6f} {}\n".format(random(), i))
+
+        def weight(line):
+            return float(line.split()[0])
+
+        for memory in (2**20, 4 * 2**20, 64 * 2**20):
+            start = perf_counter()
+            sort_file(infile, outfile, key=weight, memory=memory)
+            seconds = perf_counter() - start
+            with open(outfile, encoding="utf-8") as file:
+                weights = [weight(line) for line in file]
+            print("memory {:>6} KiB: {:.2f} s, sorted: {}".format(
+                memory // 1024, seconds, weights == sorted(weights)))
+
+
+if __name__ == "__main__":
+    main()
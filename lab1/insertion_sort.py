@@ -1,9 +1,55 @@
-def insertion_sort(mylist):
+from bisect import bisect_right
+
+
+def insertion_sort(mylist, key=None, lo=0, hi=None):
+    """Sort mylist[lo:hi] in place with a stable binary insertion sort.
+
+    The position of each item is found with a binary search, and the
+    items after it are moved along in one slice assignment rather than
+    one at a time.
+
+    Args:
+        mylist (list): The list to sort.
+        key (callable): Function of an item to sort by. (Default: None)
+        lo (int): Start of the range to sort. (Default: 0)
+        hi (int): End of the range to sort. (Default: len(mylist))
+    """
+    if hi is None:
+        hi = len(mylist)
+    if key is None:
+        _binary_insertion(mylist, None, lo, hi, lo + 1)
+    else:
+        keys = [key(mylist[i]) for i in range(lo, hi)]
+        items = mylist[lo:hi]
+        _binary_insertion(keys, items, 0, hi - lo, 1)
+        mylist[lo:hi] = items
+
+
+def _binary_insertion(keys, items, lo, hi, start):
+    """Insert keys[start:hi] into the sorted keys[lo:start].
+
+    When items is not None, it is a list the same length as keys whose
+    items are moved the same way as their keys.
+    """
+    for i in range(max(start, lo + 1), hi):
+        key = keys[i]
+        pos = bisect_right(keys, key, lo, i)
+        if pos < i:
+            keys[pos + 1:i + 1] = keys[pos:i]
+            keys[pos] = key
+            if items is not None:
+                item = items[i]
+                items[pos + 1:i + 1] = items[pos:i]
+                items[pos] = item
+
+
+def linear_insertion_sort(mylist):
+    """Sort a list in place, finding each position with a linear scan."""
     n = len(mylist)
     i = 1
     while i < n:
         j = i - 1
-        while mylist[i] < mylist[j] and j > -1:
+        while j > -1 and mylist[i] < mylist[j]:
             j -= 1
         #insert i in the cell after j
         temp = mylist[i]
@@ -0,0 +1,87 @@
+"""Lazy k-way merge of sorted iterables with the MinHeap."""
+
+import heapq
+from random import random
+from time import perf_counter
+from binaryheap import MinHeap
+
+
+def kmerge(*iterables, key=None, dedup=False):
+    """Merge sorted iterables into one sorted stream, lazily.
+
+    Only one item from each iterable is held at a time, in a MinHeap of
+    (key, source, item) entries. Items with equal keys are yielded in the
+    order of the iterables they came from, so the merge is stable. Once a
+    single iterable is left, the rest of it is passed straight through.
+
+    Args:
+        iterables (iterable): Iterables each sorted by key.
+        key (callable): Function of an item to merge by. (Default: None)
+        dedup (bool): Skip items whose key equals the key of the item
+                      yielded before them. (Default: False)
+
+    Yields:
+        The items of every iterable in sorted order.
+    """
+    heap = MinHeap()
+    iterators = [iter(iterable) for iterable in iterables]
+    for i, iterator in enumerate(iterators):
+        for item in iterator:
+            heap.add((item if key is None else key(item), i, item))
+            break
+    last = None
+    started = False
+    get_min = heap.get_min
+    replace_min = heap.replace_min
+    while heap.size() > 1:
+        item_key, i, item = get_min()
+        if not (dedup and started and item_key == last):
+            yield item
+            last = item_key
+            started = True
+        try:
+            item = next(iterators[i])
+        except StopIteration:
+            heap.remove_min()
+            continue
+        replace_min((item if key is None else key(item), i, item))
+    if heap.size() == 0:
+        return
+    item_key, i, item = heap.remove_min()
+    if not dedup:
+        yield item
+        yield from iterators[i]
+        return
+    if not (started and item_key == last):
+        yield item
+        last = item_key
+    for item in iterators[i]:
+        item_key = item if key is None else key(item)
+        if item_key != last:
+            yield item
+            last = item_key
+
+
+def main():
+    sources = 16
+    length = 50000
+    lists = [sorted(random() for _ in range(length)) for _ in range(sources)]
+    expected = sorted(item for items in lists for item in items)
+
+    start = perf_counter()
+    merged = list(kmerge(*lists))
+    kmerge_time = perf_counter() - start
+    assert merged == expected
+
+    start = perf_counter()
+    merged = list(heapq.merge(*lists))
+    heapq_time = perf_counter() - start
+    assert merged == expected
+
+    print("{} sources of {} items".format(sources, length))
+    print("kmerge:      {:.3f} s".format(kmerge_time))
+    print("heapq.merge: {:.3f} s".format(heapq_time))
+
+
+if __name__ == "__main__":
+    main()
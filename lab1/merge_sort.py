@@ -1,31 +1,278 @@
-from random import randint
+import tracemalloc
+from array import array
+from random import randint, random
+from time import perf_counter
+from insertion_sort import _binary_insertion
 
-def merge_sort(mylist):
+
+# Shortest run to merge, chosen with choose_cutoff
+CUTOFF = 32
+
+
+def merge_sort(mylist, key=None, reverse=False, cutoff=CUTOFF):
+    """Sort a list in place with a stable bottom-up merge sort.
+
+    Runs already in order are found first, and strictly descending runs
+    are reversed in place. Runs shorter than cutoff are extended to cutoff
+    items with a binary insertion sort. Neighbouring runs are then merged
+    pass by pass between mylist and a single auxiliary list of the same
+    length. Items with equal keys keep their original order, also when
+    reversed.
+
+    Args:
+        mylist (list): The list to sort.
+        key (callable): Function of an item to sort by. (Default: None)
+        reverse (bool): Sort in descending order. (Default: False)
+        cutoff (int): Shortest run to merge. (Default: CUTOFF)
+    """
+    n = len(mylist)
+    if n < 2:
+        return
+    keys = None if key is None else [key(item) for item in mylist]
+    if reverse:
+        # Sorting the reversed list ascending and reversing the result
+        # keeps equal items in their original order
+        mylist.reverse()
+        if keys is not None:
+            keys.reverse()
+    if keys is None:
+        bounds = _find_runs(mylist, None, cutoff)
+    else:
+        bounds = _find_runs(keys, mylist, cutoff)
+    if len(bounds) > 2:
+        if keys is None:
+            _merge_runs(mylist, bounds)
+        else:
+            _merge_runs_keyed(keys, mylist, bounds)
+    if reverse:
+        mylist.reverse()
+
+
+def _find_runs(keys, items, cutoff):
+    """Return the boundaries of the ascending runs in keys.
+
+    Strictly descending runs are reversed in place, and runs shorter than
+    cutoff are extended with a binary insertion sort. When items is not
+    None, its items are moved the same way as their keys.
+    """
+    n = len(keys)
+    bounds = array("l", [0])
+    lo = 0
+    while lo < n:
+        hi = lo + 1
+        if hi < n and keys[hi] < keys[lo]:
+            while hi < n and keys[hi] < keys[hi - 1]:
+                hi += 1
+            keys[lo:hi] = keys[lo:hi][::-1]
+            if items is not None:
+                items[lo:hi] = items[lo:hi][::-1]
+        else:
+            while hi < n and not keys[hi] < keys[hi - 1]:
+                hi += 1
+        if hi - lo < cutoff and hi < n:
+            end = min(n, lo + cutoff)
+            _binary_insertion(keys, items, lo, end, hi)
+            hi = end
+        bounds.append(hi)
+        lo = hi
+    return bounds
+
+
+def _merge_runs(mylist, bounds):
+    """Merge the runs of mylist between bounds until one run is left."""
+    src = mylist
+    dst = [None] * len(mylist)
+    while len(bounds) > 2:
+        # The merged bounds are written over the front of the old ones
+        w = 1
+        for r in range(0, len(bounds) - 1, 2):
+            lo = bounds[r]
+            if r + 2 < len(bounds):
+                mid = bounds[r + 1]
+                hi = bounds[r + 2]
+                _merge_into(src, dst, lo, mid, hi)
+            else:
+                hi = bounds[r + 1]
+                dst[lo:hi] = src[lo:hi]
+            bounds[w] = hi
+            w += 1
+        del bounds[w:]
+        src, dst = dst, src
+    if src is not mylist:
+        mylist[:] = src
+
+
+def _merge_into(src, dst, lo, mid, hi):
+    """Merge src[lo:mid] and src[mid:hi] into dst[lo:hi], stably."""
+    if not src[mid] < src[mid - 1]:
+        # The runs are already in order
+        dst[lo:hi] = src[lo:hi]
+        return
+    i = lo
+    j = mid
+    k = lo
+    left = src[i]
+    right = src[j]
+    while True:
+        if right < left:
+            dst[k] = right
+            k += 1
+            j += 1
+            if j == hi:
+                break
+            right = src[j]
+        else:
+            dst[k] = left
+            k += 1
+            i += 1
+            if i == mid:
+                break
+            left = src[i]
+    if i < mid:
+        dst[k:hi] = src[i:mid]
+    else:
+        dst[k:hi] = src[j:hi]
+
+
+def _merge_runs_keyed(keys, mylist, bounds):
+    """Merge runs of keys and the matching items until one run is left."""
+    ksrc = keys
+    kdst = [None] * len(keys)
+    src = mylist
+    dst = [None] * len(mylist)
+    while len(bounds) > 2:
+        w = 1
+        for r in range(0, len(bounds) - 1, 2):
+            lo = bounds[r]
+            if r + 2 < len(bounds):
+                mid = bounds[r + 1]
+                hi = bounds[r + 2]
+                _merge_into_keyed(ksrc, kdst, src, dst, lo, mid, hi)
+            else:
+                hi = bounds[r + 1]
+                kdst[lo:hi] = ksrc[lo:hi]
+                dst[lo:hi] = src[lo:hi]
+            bounds[w] = hi
+            w += 1
+        del bounds[w:]
+        ksrc, kdst = kdst, ksrc
+        src, dst = dst, src
+    if src is not mylist:
+        mylist[:] = src
+
+
+def _merge_into_keyed(ksrc, kdst, src, dst, lo, mid, hi):
+    """Merge two runs by their keys, moving the keys and items together."""
+    if not ksrc[mid] < ksrc[mid - 1]:
+        kdst[lo:hi] = ksrc[lo:hi]
+        dst[lo:hi] = src[lo:hi]
+        return
+    i = lo
+    j = mid
+    k = lo
+    left = ksrc[i]
+    right = ksrc[j]
+    while True:
+        if right < left:
+            kdst[k] = right
+            dst[k] = src[j]
+            k += 1
+            j += 1
+            if j == hi:
+                break
+            right = ksrc[j]
+        else:
+            kdst[k] = left
+            dst[k] = src[i]
+            k += 1
+            i += 1
+            if i == mid:
+                break
+            left = ksrc[i]
+    if i < mid:
+        kdst[k:hi] = ksrc[i:mid]
+        dst[k:hi] = src[i:mid]
+    else:
+        kdst[k:hi] = ksrc[j:hi]
+        dst[k:hi] = src[j:hi]
+
+
+def merge_sort_recursive(mylist):
+    """Sort a list in place with a top-down merge sort.
+
+    Each call sorts copies of the two halves of the list and merges them
+    back, so it allocates new lists at every level of the recursion.
+    """
     n = len(mylist)
     if n > 1:
         list1 = mylist[:n//2]
         list2 = mylist[n//2:]
-        merge_sort(list1)
-        merge_sort(list2)
+        merge_sort_recursive(list1)
+        merge_sort_recursive(list2)
         merge(list1, list2, mylist)
 
 
 def merge(list1, list2, mylist):
+    """Merge two sorted lists into mylist, which holds both of their items."""
+    n1 = len(list1)
+    n2 = len(list2)
     f1 = 0
     f2 = 0
-    while f1 + f2 < len(mylist):
-        if f1 == len(list1):
-            mylist[f1+f2] = list2[f2]
-            f2 += 1
-        elif f2 == len(list2):
-            mylist[f1+f2] = list1[f1]
-            f1 += 1
-        elif list2[f2] < list1[f1]:
-            mylist[f1+f2] = list2[f2]
+    k = 0
+    while f1 < n1 and f2 < n2:
+        if list2[f2] < list1[f1]:
+            mylist[k] = list2[f2]
             f2 += 1
         else:
-            mylist[f1+f2] = list1[f1]
+            mylist[k] = list1[f1]
             f1 += 1
+        k += 1
+    if f1 < n1:
+        mylist[k:] = list1[f1:]
+    else:
+        mylist[k:] = list2[f2:]
+
+
+def _measure(sort, items):
+    """Return the seconds and peak bytes allocated to sort a copy of items."""
+    to_sort = list(items)
+    start = perf_counter()
+    sort(to_sort)
+    seconds = perf_counter() - start
+    to_sort = list(items)
+    tracemalloc.start()
+    sort(to_sort)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (seconds, peak)
+
+
+def choose_cutoff(candidates=(1, 4, 8, 16, 24, 32, 48, 64, 96, 128),
+                  n=50000, repeat=3):
+    """Time merge_sort on random floats with each cutoff.
+
+    Args:
+        candidates (tuple): The cutoffs to try.
+        n (int): Length of the lists to sort. (Default: 50000)
+        repeat (int): Number of lists sorted per cutoff, keeping the
+                      fastest time. (Default: 3)
+
+    Returns:
+        The fastest cutoff, and a dictionary of each cutoff's seconds.
+    """
+    lists = [[random() for _ in range(n)] for _ in range(repeat)]
+    times = {}
+    for cutoff in candidates:
+        best = None
+        for items in lists:
+            to_sort = list(items)
+            start = perf_counter()
+            merge_sort(to_sort, cutoff=cutoff)
+            seconds = perf_counter() - start
+            if best is None or seconds < best:
+                best = seconds
+        times[cutoff] = best
+    return min(times, key=times.get), times
 
 
 def main():
@@ -34,6 +281,25 @@ def main():
         to_sort.append(randint(i, 100))
     merge_sort(to_sort)
     print(to_sort)
+    print()
+
+    print("{:>10}{:>16}{:>16}{:>16}{:>16}".format(
+        "n", "top-down (ms)", "bottom-up (ms)", "top-down (KiB)",
+        "bottom-up (KiB)"))
+    for n in (1000, 10000, 100000, 1000000):
+        items = [random() for _ in range(n)]
+        old_time, old_peak = _measure(merge_sort_recursive, items)
+        new_time, new_peak = _measure(merge_sort, items)
+        print("{:>10}{:>16.1f}{:>16.1f}{:>16.1f}{:>16.1f}".format(
+            n, old_time * 1000, new_time * 1000, old_peak / 1024,
+            new_peak / 1024))
+    print()
+
+    best, times = choose_cutoff()
+    print("{:>10}{:>12}".format("cutoff", "time (ms)"))
+    for cutoff, seconds in times.items():
+        print("{:>10}{:>12.1f}".format(cutoff, seconds * 1000))
+    print("fastest cutoff: {}".format(best))
 
 
 if __name__ == "__main__":
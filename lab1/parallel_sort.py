@@ -0,0 +1,226 @@
+"""Parallel merge sort across processes with shared memory."""
+
+import os
+from array import array
+from bisect import bisect_left
+from multiprocessing import Pool, shared_memory
+from random import random
+from time import perf_counter
+from binaryheap import MinHeap
+from merge_sort import merge_sort
+
+
+def _layout(n, itemsize, with_ids):
+    """Return the byte offsets of the arrays in a block for n items.
+
+    The block holds the keys, the merged keys, and when sorting records,
+    the ids of the records the keys belong to and the merged ids.
+    """
+    keys = n * itemsize
+    ids = n * 8 if with_ids else 0
+    return (0, keys, 2 * keys, 2 * keys + ids, 2 * keys + 2 * ids)
+
+
+class _SortBlock:
+    """Views over the arrays of a shared memory block being sorted."""
+
+    def __init__(self, shm, n, typecode, with_ids):
+        itemsize = array(typecode).itemsize
+        keys, merged, ids, merged_ids, end = _layout(n, itemsize, with_ids)
+        buf = shm.buf
+        self.shm = shm
+        self.keys = buf[keys:merged].cast(typecode)
+        self.merged = buf[merged:ids].cast(typecode)
+        self.ids = buf[ids:merged_ids].cast("q") if with_ids else None
+        self.merged_ids = buf[merged_ids:end].cast("q") if with_ids else None
+        self.typecode = typecode
+
+    def release(self):
+        """Release the views so the block can be closed."""
+        for view in (self.keys, self.merged, self.ids, self.merged_ids):
+            if view is not None:
+                view.release()
+
+
+def _attach_worker(name, n, typecode, with_ids):
+    """Pool initializer that attaches the worker to the block to sort."""
+    global _worker_block
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_block = _SortBlock(shm, n, typecode, with_ids)
+
+
+def _worker_sort_chunk(lo, hi):
+    """Sort keys[lo:hi] of the worker's block in place, stably."""
+    block = _worker_block
+    keys = block.keys[lo:hi].tolist()
+    if block.ids is None:
+        merge_sort(keys)
+        block.keys[lo:hi] = array(block.typecode, keys)
+    else:
+        order = list(range(hi - lo))
+        merge_sort(order, key=keys.__getitem__)
+        block.keys[lo:hi] = array(block.typecode, [keys[i] for i in order])
+        ids = block.ids
+        block.ids[lo:hi] = array("q", [ids[lo + i] for i in order])
+
+
+def _worker_merge(pieces, start):
+    """Merge sorted pieces of the keys into merged, from index start.
+
+    Args:
+        pieces (list): (lo, hi) ranges of the keys, one from each sorted
+                       chunk in chunk order.
+        start (int): Index in merged to write the first item to.
+    """
+    block = _worker_block
+    keys = block.keys
+    heap = MinHeap()
+    # Entries hold the chunk number, so equal keys keep the chunk order
+    for chunk, (lo, hi) in enumerate(pieces):
+        if lo < hi:
+            heap.add((keys[lo], chunk, lo))
+    positions = []
+    while heap.size() > 0:
+        key, chunk, i = heap.get_min()
+        positions.append(i)
+        i += 1
+        if i < pieces[chunk][1]:
+            heap.replace_min((keys[i], chunk, i))
+        else:
+            heap.remove_min()
+    end = start + len(positions)
+    block.merged[start:end] = array(block.typecode,
+                                    [keys[i] for i in positions])
+    if block.ids is not None:
+        ids = block.ids
+        block.merged_ids[start:end] = array("q", [ids[i] for i in positions])
+
+
+def _splitters(keys, chunks, count, samples=32):
+    """Return count - 1 keys that split sorted chunks into count parts."""
+    sample = []
+    for lo, hi in chunks:
+        step = max(1, (hi - lo) // samples)
+        sample.extend(keys[i] for i in range(lo, hi, step))
+    merge_sort(sample)
+    return [sample[len(sample) * j // count] for j in range(1, count)]
+
+
+def _exact_keys(keys):
+    """Return keys as an array that holds every key exactly, or None.
+
+    Integers are kept in a signed 64 bit array. Floats, and integers small
+    enough to be exact as floats, are kept in a double array.
+    """
+    try:
+        return array("q", keys)
+    except (TypeError, OverflowError):
+        pass
+    for k in keys:
+        if isinstance(k, float):
+            continue
+        if not isinstance(k, int) or abs(k) > 2**53:
+            return None
+    return array("d", keys)
+
+
+def parallel_sort(values, key=None, processes=None, min_size=10000):
+    """Sort a numeric array or a list of records in place across processes.
+
+    The keys are copied into a shared memory block that every worker
+    attaches to, so no data is pickled. Each worker sorts one contiguous
+    chunk with merge_sort. Splitters sampled from the sorted chunks then
+    divide the keys into one range per worker, and each worker merges
+    its range from every chunk with a k-way merge into its own part of
+    the output. Equal keys keep their original order.
+
+    Args:
+        values (array or list): An array of numbers, a list of numbers,
+                                or with key, an array or list of records.
+                                A list keeps its own objects. Inputs whose
+                                keys are not all integers that fit in 64
+                                bits or floats are sorted in this process.
+        key (callable): Function of a record giving its numeric key.
+                        (Default: None)
+        processes (int): Number of worker processes. (Default: the number
+                         of CPUs)
+        min_size (int): Inputs shorter than this are sorted in this
+                        process. (Default: 10000)
+    """
+    n = len(values)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    keys = None
+    if n >= min_size and processes >= 2:
+        if key is not None:
+            keys = _exact_keys([key(record) for record in values])
+        elif isinstance(values, array):
+            keys = values
+        else:
+            keys = _exact_keys(values)
+    if keys is None:
+        if isinstance(values, array):
+            items = values.tolist()
+            merge_sort(items, key=key)
+            values[:] = array(values.typecode, items)
+        else:
+            merge_sort(values, key=key)
+        return
+    with_ids = keys is not values
+    typecode = keys.typecode
+    size = _layout(n, keys.itemsize, with_ids)[-1]
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    block = _SortBlock(shm, n, typecode, with_ids)
+    try:
+        block.keys[:] = keys
+        if with_ids:
+            block.ids[:] = array("q", range(n))
+        chunks = [(n * i // processes, n * (i + 1) // processes)
+                  for i in range(processes)]
+        with Pool(processes, _attach_worker,
+                  (shm.name, n, typecode, with_ids)) as pool:
+            pool.starmap(_worker_sort_chunk, chunks)
+            splitters = _splitters(block.keys, chunks, processes)
+            bounds = [[bisect_left(block.keys, s, lo, hi) for s in splitters]
+                      for lo, hi in chunks]
+            tasks = []
+            start = 0
+            for j in range(processes):
+                pieces = []
+                for c, (lo, hi) in enumerate(chunks):
+                    first = lo if j == 0 else bounds[c][j - 1]
+                    last = hi if j == processes - 1 else bounds[c][j]
+                    pieces.append((first, last))
+                tasks.append((pieces, start))
+                start += sum(last - first for first, last in pieces)
+            pool.starmap(_worker_merge, tasks)
+        if with_ids:
+            ordered = [values[i] for i in block.merged_ids]
+            if isinstance(values, array):
+                ordered = array(values.typecode, ordered)
+            values[:] = ordered
+        else:
+            with memoryview(values) as view:
+                view[:] = block.merged
+    finally:
+        block.release()
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    n = 1000000
+    values = array("d", [random() for _ in range(n)])
+    expected = sorted(values)
+    print("{:>10}{:>12}".format("processes", "time (s)"))
+    for processes in (1, 2, 4, 8):
+        to_sort = array("d", values)
+        start = perf_counter()
+        parallel_sort(to_sort, processes=processes)
+        seconds = perf_counter() - start
+        assert to_sort.tolist() == expected
+        print("{:>10}{:>12.2f}".format(processes, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Streaming top-k selection with the binary heaps."""
+
+from random import randint
+from binaryheap import MaxHeap, MinHeap
+
+
+def smallest(iterable, k, key=None):
+    """Return the k smallest items from an iterable in one pass.
+
+    Keeps at most k items in a MaxHeap, replacing the largest of them
+    whenever a smaller item arrives. Equal items keep their input order.
+
+    Args:
+        iterable (iterable): The items to select from.
+        k (int): The number of items to return.
+        key (callable): Function of an item to compare by. (Default: None)
+
+    Returns:
+        A list of up to k items in ascending order.
+    """
+    if k <= 0:
+        return []
+    heap = MaxHeap()
+    for i, item in enumerate(iterable):
+        value = item if key is None else key(item)
+        # Later items sort after earlier equal ones, so they leave first
+        entry = (value, i, item)
+        if heap.size() < k:
+            heap.add(entry)
+        elif entry[:2] < heap.get_max()[:2]:
+            heap.remove_max()
+            heap.add(entry)
+    result = []
+    while heap.size() > 0:
+        result.append(heap.remove_max()[2])
+    result.reverse()
+    return result
+
+
+def largest(iterable, k, key=None):
+    """Return the k largest items from an iterable in one pass.
+
+    Keeps at most k items in a MinHeap, replacing the smallest of them
+    whenever a larger item arrives. Equal items keep their input order.
+
+    Args:
+        iterable (iterable): The items to select from.
+        k (int): The number of items to return.
+        key (callable): Function of an item to compare by. (Default: None)
+
+    Returns:
+        A list of up to k items in descending order.
+    """
+    if k <= 0:
+        return []
+    heap = MinHeap()
+    for i, item in enumerate(iterable):
+        value = item if key is None else key(item)
+        # Later items sort before earlier equal ones, so they leave first
+        entry = (value, -i, item)
+        if heap.size() < k:
+            heap.add(entry)
+        elif entry[:2] > heap.get_min()[:2]:
+            heap.remove_min()
+            heap.add(entry)
+    result = []
+    while heap.size() > 0:
+        result.append(heap.remove_min()[2])
+    result.reverse()
+    return result
+
+
+def main():
+    items = [randint(0, 100) for _ in range(20)]
+    print(items)
+    print("5 smallest: {}".format(smallest(items, 5)))
+    print("5 largest: {}".format(largest(items, 5)))
+
+
+if __name__ == "__main__":
+    main()